@@ -4,6 +4,105 @@ import math
 import numpy as np
 import time
 
+# 只为前 DETAIL_PLANETS 颗行星绘制轨道、扫过的面积和文字标注，其余行星只画成小圆点
+DETAIL_PLANETS = 20
+# 行星颜色从固定数量的调色板中取用，表中只存颜色编号
+PALETTE_SIZE = 64
+# 画布大小 (与 setup_canvas 一致)，其余行星的圆点先画到同样大小的图像上
+CANVAS_WIDTH = 900
+CANVAS_HEIGHT = 800
+
+# 行星表的字段和数据类型
+PLANET_FIELDS = {
+    'a': np.float64,               # 半长轴
+    'e': np.float64,               # 离心率
+    'angle': np.float64,           # 当前角度
+    'last_update': np.float64,     # 上次更新位置的时间
+    'last_area_time': np.float64,  # 本段扫过面积的开始时间
+    'color_index': np.int32,       # 调色板中的颜色编号
+}
+
+class PlanetTable:
+    """所有行星的轨道状态，每个字段一个 NumPy 数组，第 i 颗行星为各数组的第 i 项
+
+    字段见 PLANET_FIELDS，按属性读取 (table.a、table.angle 等) 得到长度为行星数的视图。
+    数组容量按两倍增长，增删行星时不必每次重新分配。
+    扫过面积用的位置和面积历史 (positions、areas) 是每颗行星一个列表，只为详细显示的行星记录。
+    """
+    def __init__(self, capacity=16):
+        self.count = 0
+        self._store = {name: np.zeros(capacity, dtype=dtype) for name, dtype in PLANET_FIELDS.items()}
+        self.positions = []
+        self.areas = []
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        if name in PLANET_FIELDS:
+            return self._store[name][:self.count]
+        raise AttributeError(name)
+
+    def add(self, a, e, angle, color_index, now):
+        """追加一颗或多颗行星，参数可以是标量或数组 (标量广播到每颗行星)"""
+        a, e, angle, color_index = np.broadcast_arrays(a, e, angle, color_index)
+        new = self.count + a.size
+        capacity = len(self._store['a'])
+        if new > capacity:
+            for name, store in self._store.items():
+                grown = np.zeros(max(new, 2 * capacity), dtype=store.dtype)
+                grown[:self.count] = store[:self.count]
+                self._store[name] = grown
+        values = {'a': a, 'e': e, 'angle': angle, 'last_update': now,
+                  'last_area_time': now, 'color_index': color_index}
+        for name, value in values.items():
+            self._store[name][self.count:new] = np.ravel(value)
+        self.positions.extend([] for _ in range(new - self.count))
+        self.areas.extend([] for _ in range(new - self.count))
+        self.count = new
+
+    def remove(self, indices):
+        """删除给定编号的行星，其余行星保持原来的顺序"""
+        keep = np.ones(self.count, dtype=bool)
+        keep[np.asarray(indices, dtype=np.int64)] = False
+        new = int(keep.sum())
+        for store in self._store.values():
+            store[:new] = store[:self.count][keep]
+        self.positions = [p for p, k in zip(self.positions, keep) if k]
+        self.areas = [p for p, k in zip(self.areas, keep) if k]
+        self.count = new
+
+    def reset_area_history(self, now):
+        for i in range(self.count):
+            self.positions[i] = []
+            self.areas[i] = []
+        self.last_area_time[:] = now
+
+    def radii(self, angle=None):
+        """轨道方程 r = a (1 - e^2) / (1 + e cos(angle))，angle 默认为当前角度"""
+        angle = self.angle if angle is None else angle
+        return self.a * (1 - self.e**2) / (1 + self.e * np.cos(angle))
+
+    def propagate(self, now, speed_multiplier):
+        """按经过的时间一次推进所有行星，返回相对太阳的位置 (x, y)"""
+        dt = (now - self.last_update) * speed_multiplier
+        r = self.radii()
+        angle = self.angle
+        angle += 50 / r**2 * dt
+        self.last_update[:] = now
+        r = self.radii()
+        return r * np.cos(angle), r * np.sin(angle)
+
+    def orbit_groups(self):
+        """把 (a, e) 相同的行星归为一条轨道，按轨道第一次出现的顺序返回 [(a, e, 行星编号数组)]"""
+        if self.count == 0:
+            return []
+        keys = np.stack([np.round(self.a, 1), np.round(self.e, 3)], axis=1)
+        unique_keys, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        members = np.split(np.argsort(inverse, kind='stable'), np.cumsum(np.bincount(inverse))[:-1])
+        return [(unique_keys[k, 0], unique_keys[k, 1], members[k]) for k in np.argsort(first)]
+
 class KeplerSimulation:
     def __init__(self, root):
         self.root = root
@@ -24,7 +123,10 @@ class KeplerSimulation:
         self.setup_control_panel()
         
         # 初始化模拟参数
-        self.planets = []
+        self.planets = PlanetTable()
+        palette = np.random.randint(100, 255, size=(PALETTE_SIZE, 3))
+        self.palette = ['#{:02x}{:02x}{:02x}'.format(*color) for color in palette]
+        self.palette_rgb = palette.astype(np.uint8)
         self.speed_multiplier = 1.0
         self.area_time_interval = 2.0  # 扫过面积的时间间隔(秒)
         self.last_update = time.perf_counter()
@@ -50,8 +152,12 @@ class KeplerSimulation:
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # 计算中心点
-        self.center_x = 450
-        self.center_y = 400
+        self.center_x = CANVAS_WIDTH // 2
+        self.center_y = CANVAS_HEIGHT // 2
+        
+        # 详细显示以外的行星画在这张图像上，每帧作为一个画布对象显示
+        self.bulk_pixels = np.zeros((CANVAS_HEIGHT, CANVAS_WIDTH, 3), dtype=np.uint8)
+        self.bulk_image = tk.PhotoImage(width=CANVAS_WIDTH, height=CANVAS_HEIGHT)
         
     def setup_control_panel(self):
         # 创建带滚动条的控制面板框架
@@ -265,10 +371,7 @@ dA/dt = L/(2m) = 常量
     def update_area_time(self, value):
         self.area_time_interval = float(value)
         # 重置所有行星的位置历史
-        for planet in self.planets:
-            planet['positions'] = []
-            planet['areas'] = []
-            planet['last_area_time'] = time.perf_counter()
+        self.planets.reset_area_history(time.perf_counter())
     
     def calculate_area(self, points):
         """计算多边形面积"""
@@ -287,39 +390,52 @@ dA/dt = L/(2m) = 常量
         
     def remove_planet(self):
         """删除最后添加的行星"""
-        if self.planets:
-            self.planets.pop()
+        if len(self.planets):
+            self.planets.remove([len(self.planets) - 1])
             self.update_orbits_list()  # 更新轨道列表
             
     def update_speed(self, value):
         self.speed_multiplier = float(value)
         
-    def get_planet_position(self, planet):
-        # 计算行星在椭圆轨道上的位置
-        r = (planet['a'] * (1 - planet['e']**2)) / (1 + planet['e'] * math.cos(planet['angle']))
-        x = r * math.cos(planet['angle'])
-        y = r * math.sin(planet['angle'])
-        return x, y
-        
-    def calculate_velocity(self, planet):
-        """根据开普勒第二定律计算速度"""
-        # 计算轨道参数
-        a = planet['a']
-        e = planet['e']
-        r = (a * (1 - e**2)) / (1 + e * math.cos(planet['angle']))
-        
-        # 计算速度（根据开普勒第二定律）
-        # v = sqrt(GM * (2/r - 1/a))
-        velocity = math.sqrt(self.GM * (2/r - 1/a))
-        return velocity
-        
+    def calculate_velocities(self, r, a):
+        """根据活力公式计算速度 v = sqrt(GM * (2/r - 1/a))，r 和 a 可以是数组"""
+        return np.sqrt(self.GM * (2/r - 1/a))
+    
+    def draw_bulk_planets(self, screen_x, screen_y, color_index):
+        """把大量行星画成 3x3 像素的圆点，整体作为一张图像显示"""
+        self.bulk_pixels[:] = 0
+        px = np.rint(screen_x).astype(np.int64)
+        py = np.rint(screen_y).astype(np.int64)
+        colors = self.palette_rgb[color_index]
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                x = px + dx
+                y = py + dy
+                inside = (x >= 0) & (x < CANVAS_WIDTH) & (y >= 0) & (y < CANVAS_HEIGHT)
+                self.bulk_pixels[y[inside], x[inside]] = colors[inside]
+        header = b'P6 %d %d 255 ' % (CANVAS_WIDTH, CANVAS_HEIGHT)
+        self.bulk_image.configure(data=header + self.bulk_pixels.tobytes(), format='PPM')
+        self.canvas.create_image(0, 0, image=self.bulk_image, anchor='nw')
+    
     def update(self):
         if self.running:
             current_time = time.perf_counter()
+            planets = self.planets
             
             # 清空画布
             self.canvas.delete('all')
             
+            # 一次推进所有行星
+            x, y = planets.propagate(current_time, self.speed_multiplier)
+            all_screen_x = x + self.center_x
+            all_screen_y = y + self.center_y
+            
+            # 详细显示以外的行星画在最底层
+            detail = min(len(planets), DETAIL_PLANETS)
+            if len(planets) > detail:
+                self.draw_bulk_planets(all_screen_x[detail:], all_screen_y[detail:],
+                                       planets.color_index[detail:])
+            
             # 绘制太阳
             self.canvas.create_oval(
                 self.center_x-10, self.center_y-10,
@@ -327,70 +443,69 @@ dA/dt = L/(2m) = 常量
                 fill='yellow'
             )
             
-            for planet in self.planets:
-                # 更新行星位置
-                dt = (current_time - planet['last_update']) * self.speed_multiplier
-                r = math.sqrt(sum(p**2 for p in self.get_planet_position(planet)))
-                angular_velocity = 50 / (r**2)
-                planet['angle'] += angular_velocity * dt
-                planet['last_update'] = current_time
-                
-                # 获取当前位置
-                x, y = self.get_planet_position(planet)
-                screen_x = x + self.center_x
-                screen_y = y + self.center_y
+            # 详细显示的行星的速度和近日点、远日点速度
+            a = planets.a[:detail]
+            e = planets.e[:detail]
+            velocities = self.calculate_velocities(np.hypot(x[:detail], y[:detail]), a)
+            min_velocities = self.calculate_velocities(a*(1+e), a)
+            max_velocities = self.calculate_velocities(a*(1-e), a)
+            orbit_angles = np.linspace(0, 2*math.pi, 100)
+            
+            for i in range(detail):
+                color = self.palette[planets.color_index[i]]
+                screen_x = float(all_screen_x[i])
+                screen_y = float(all_screen_y[i])
+                positions = planets.positions[i]
+                areas = planets.areas[i]
                 
                 # 更新位置历史和面积计算
-                if current_time - planet['last_area_time'] >= self.area_time_interval:
+                if current_time - planets.last_area_time[i] >= self.area_time_interval:
                     # 保存上一次的面积用于比较
-                    if len(planet['positions']) > 2:
+                    if len(positions) > 2:
                         area_points = [(self.center_x, self.center_y)]
-                        area_points.extend(planet['positions'])
+                        area_points.extend(positions)
                         area = self.calculate_area(area_points)
-                        planet['areas'].append(area)
-                        if len(planet['areas']) > 5:  # 保留最近5个面积记录
-                            planet['areas'].pop(0)
+                        areas.append(area)
+                        if len(areas) > 5:  # 保留最近5个面积记录
+                            areas.pop(0)
                     
-                    planet['positions'] = []
-                    planet['last_area_time'] = current_time
+                    positions = planets.positions[i] = []
+                    planets.last_area_time[i] = current_time
                 
-                planet['positions'].append((screen_x, screen_y))
+                positions.append((screen_x, screen_y))
                 
                 # 绘制轨道
-                points = []
-                for angle in np.linspace(0, 2*math.pi, 100):
-                    r = (planet['a'] * (1 - planet['e']**2)) / (1 + planet['e'] * math.cos(angle))
-                    x = r * math.cos(angle) + self.center_x
-                    y = r * math.sin(angle) + self.center_y
-                    points.append(x)
-                    points.append(y)
-                self.canvas.create_line(points, fill='white', dash=(2, 2))
+                r = a[i] * (1 - e[i]**2) / (1 + e[i] * np.cos(orbit_angles))
+                points = np.empty((len(orbit_angles), 2))
+                points[:, 0] = r * np.cos(orbit_angles) + self.center_x
+                points[:, 1] = r * np.sin(orbit_angles) + self.center_y
+                self.canvas.create_line(points.ravel().tolist(), fill='white', dash=(2, 2))
                 
                 # 绘制扫过的面积
-                if len(planet['positions']) > 2:
+                if len(positions) > 2:
                     area_points = [(self.center_x, self.center_y)]
-                    area_points.extend(planet['positions'])
+                    area_points.extend(positions)
                     current_area = self.calculate_area(area_points)
                     
                     # 绘制面积
                     self.canvas.create_polygon(
                         *[coord for point in area_points for coord in point],
-                        fill=planet['color'],
+                        fill=color,
                         stipple='gray50'
                     )
                     
                     # 显示当前面积和历史比较
-                    avg_area = np.mean(planet['areas']) if planet['areas'] else 0
+                    avg_area = np.mean(areas) if areas else 0
                     diff_percent = ((current_area - avg_area) / avg_area * 100) if avg_area else 0
                     
                     area_text = f"面积: {current_area/1000:.1f}"
-                    if len(planet['areas']) > 1:
+                    if len(areas) > 1:
                         area_text += f"\n差异: {diff_percent:+.1f}%"
                     
                     self.canvas.create_text(
                         screen_x + 15, screen_y + 15,
                         text=area_text,
-                        fill=planet['color'],
+                        fill=color,
                         anchor='w'
                     )
                 
@@ -398,14 +513,13 @@ dA/dt = L/(2m) = 常量
                 self.canvas.create_oval(
                     screen_x-5, screen_y-5,
                     screen_x+5, screen_y+5,
-                    fill=planet['color']
+                    fill=color
                 )
                 
-                # 更新速度显示
-                velocity = self.calculate_velocity(planet)
                 # 显示速度，添加单位和相对速度
-                min_velocity = math.sqrt(self.GM * (2/(planet['a']*(1+planet['e'])) - 1/planet['a']))
-                max_velocity = math.sqrt(self.GM * (2/(planet['a']*(1-planet['e'])) - 1/planet['a']))
+                velocity = velocities[i]
+                min_velocity = min_velocities[i]
+                max_velocity = max_velocities[i]
                 relative_speed = (velocity - min_velocity) / (max_velocity - min_velocity)
                 
                 velocity_text = (
@@ -416,45 +530,46 @@ dA/dt = L/(2m) = 常量
                 self.canvas.create_text(
                     screen_x + 15, screen_y - 15,
                     text=velocity_text,
-                    fill=planet['color'],
+                    fill=color,
                     anchor='w'
                 )
                 
                 # 在近日点和远日点标注最大最小速度
-                if abs(planet['angle'] % (2*math.pi)) < 0.1:  # 近日点
+                angle = planets.angle[i] % (2*math.pi)
+                if angle < 0.1:  # 近日点
                     self.canvas.create_text(
                         screen_x, screen_y - 30,
                         text=f"近日点\n最大速度: {max_velocity:.1f}",
-                        fill=planet['color']
+                        fill=color
                     )
-                elif abs(planet['angle'] % (2*math.pi) - math.pi) < 0.1:  # 远日点
+                elif abs(angle - math.pi) < 0.1:  # 远日点
                     self.canvas.create_text(
                         screen_x, screen_y - 30,
                         text=f"远日点\n最小速度: {min_velocity:.1f}",
-                        fill=planet['color']
+                        fill=color
                     )
             
             # 更新面积比较信息
-            if self.planets:
+            if detail:
                 areas_info = "面积比较:\n"
-                for i, planet in enumerate(self.planets):
-                    if planet['areas']:
-                        areas_info += f"行星{i+1}: {np.mean(planet['areas'])/1000:.1f}\n"
+                for i in range(detail):
+                    if planets.areas[i]:
+                        areas_info += f"行星{i+1}: {np.mean(planets.areas[i])/1000:.1f}\n"
                 self.area_compare_label.config(text=areas_info)
             
             # 更新信息标签
             self.info_label.config(
-                text=f"行星数量: {len(self.planets)}\n" +
+                text=f"行星数量: {len(planets)}\n" +
                      f"模拟速度: {self.speed_multiplier:.1f}x\n" +
                      f"面积计算间隔: {self.area_time_interval:.1f}秒"
             )
             
             # 在轨道上显示轨道参数
-            for i, planet in enumerate(self.planets):
+            for i in range(detail):
                 self.canvas.create_text(
-                    self.center_x - planet['a'], self.center_y - 10,
-                    text=f"轨道 {i+1}\ne={planet['e']:.2f}",
-                    fill=planet['color'],
+                    self.center_x - a[i], self.center_y - 10,
+                    text=f"轨道 {i+1}\ne={e[i]:.2f}",
+                    fill=self.palette[planets.color_index[i]],
                     anchor='e'
                 )
             
@@ -469,39 +584,27 @@ dA/dt = L/(2m) = 常量
 
     def add_planet_same_orbit(self):
         """在最后一个行星的轨道上添加新行星"""
-        if not self.planets:
+        if not len(self.planets):
             self.add_planet_new_orbit()
             return
         
-        last_planet = self.planets[-1]
         # 在相同轨道上，但位置随机
         angle = np.random.uniform(0, 2*math.pi)
         self.add_planet_with_params(
-            last_planet['a'],
-            last_planet['e'],
+            self.planets.a[-1],
+            self.planets.e[-1],
             angle
         )
 
     def add_planet_with_params(self, a, e, angle=0):
         """使用指定参数添加行星"""
-        color = '#{:02x}{:02x}{:02x}'.format(
-            np.random.randint(100, 255),
-            np.random.randint(100, 255),
-            np.random.randint(100, 255)
-        )
-        
-        planet = {
-            'a': a,                  # 半长轴
-            'e': e,                  # 离心率
-            'angle': angle,          # 初始角度
-            'color': color,          # 颜色
-            'positions': [],         # 位置历史
-            'areas': [],            # 面积历史
-            'last_area_time': time.perf_counter(),
-            'last_update': time.perf_counter()
-        }
-        
-        self.planets.append(planet)
+        self.add_planets_with_params(a, e, angle)
+
+    def add_planets_with_params(self, a, e, angle=0):
+        """一次添加多颗行星，a、e、angle 可以是数组，颜色从调色板中随机选取"""
+        count = np.broadcast(a, e, angle).size
+        color_index = np.random.randint(0, PALETTE_SIZE, size=count)
+        self.planets.add(a, e, angle, color_index, time.perf_counter())
         self.update_orbits_list()  # 更新轨道列表
 
     def update_eccentricity(self, value=None):
@@ -511,17 +614,9 @@ dA/dt = L/(2m) = 常量
     def update_orbits_list(self):
         """更新轨道列表显示"""
         self.orbits_listbox.delete(0, tk.END)
-        orbits = {}
-        for i, planet in enumerate(self.planets):
-            orbit_key = f"{planet['a']:.1f}_{planet['e']:.3f}"
-            if orbit_key not in orbits:
-                orbits[orbit_key] = []
-            orbits[orbit_key].append(i)
-        
-        for orbit_key, planet_indices in orbits.items():
-            a, e = map(float, orbit_key.split('_'))
+        for k, (a, e, planet_indices) in enumerate(self.planets.orbit_groups()):
             self.orbits_listbox.insert(tk.END, 
-                f"轨道 {len(orbits)}: {len(planet_indices)}颗行星 "
+                f"轨道 {k+1}: {len(planet_indices)}颗行星 "
                 f"(a={a:.1f}, e={e:.3f})")
 
     def remove_selected_orbit(self):
@@ -530,24 +625,11 @@ dA/dt = L/(2m) = 常量
         if not selection:
             return
         
-        # 获取选中轨道的参数
-        orbit_info = self.orbits_listbox.get(selection[0])
-        orbit_num = int(orbit_info.split(':')[0].split()[-1]) - 1
-        
-        # 找到该轨道上的所有行星
-        orbits = {}
-        for i, planet in enumerate(self.planets):
-            orbit_key = f"{planet['a']:.1f}_{planet['e']:.3f}"
-            if orbit_key not in orbits:
-                orbits[orbit_key] = []
-            orbits[orbit_key].append(i)
-        
-        # 获取要删除的行星索引
-        orbit_keys = list(orbits.keys())
-        if orbit_num < len(orbit_keys):
-            indices_to_remove = sorted(orbits[orbit_keys[orbit_num]], reverse=True)
-            for idx in indices_to_remove:
-                self.planets.pop(idx)
+        # 列表的第 k 行对应第 k 条轨道
+        orbits = self.planets.orbit_groups()
+        orbit_num = selection[0]
+        if orbit_num < len(orbits):
+            self.planets.remove(orbits[orbit_num][2])
         
         self.update_orbits_list()
 
@@ -557,23 +639,11 @@ dA/dt = L/(2m) = 常量
         if not selection:
             return
         
-        # 获取选中轨道的参数
-        orbit_info = self.orbits_listbox.get(selection[0])
-        orbit_num = int(orbit_info.split(':')[0].split()[-1]) - 1
-        
-        # 找到该轨道上的行星
-        orbits = {}
-        for i, planet in enumerate(self.planets):
-            orbit_key = f"{planet['a']:.1f}_{planet['e']:.3f}"
-            if orbit_key not in orbits:
-                orbits[orbit_key] = []
-            orbits[orbit_key].append(i)
-        
         # 删除该轨道上的最后一颗行星
-        orbit_keys = list(orbits.keys())
-        if orbit_num < len(orbit_keys) and orbits[orbit_keys[orbit_num]]:
-            idx = orbits[orbit_keys[orbit_num]][-1]
-            self.planets.pop(idx)
+        orbits = self.planets.orbit_groups()
+        orbit_num = selection[0]
+        if orbit_num < len(orbits):
+            self.planets.remove([orbits[orbit_num][2][-1]])
         
         self.update_orbits_list()
 
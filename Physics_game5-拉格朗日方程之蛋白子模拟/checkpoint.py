@@ -0,0 +1,103 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import os
+import tempfile
+import numpy as np
+from neighbor_search import VerletList
+from protein_physics import NEIGHBOR_SKIN
+from potentials import PotentialSet, parse_potential
+from topology import TOPOLOGY_ARRAYS, Topology
+
+# 检查点文件为 .npz 格式：
+#   positions, velocities, masses, colors (紧凑状态下为空数组)  粒子状态
+#   rng_keys, rng_pos, rng_has_gauss, rng_cached_gaussian    numpy 全局随机数生成器状态
+#   topology_bonds 等  成键拓扑的各个数组 (见 topology.TOPOLOGY_ARRAYS)，没有拓扑时不保存
+#   meta  JSON 字符串，保存版本、步数、模拟参数和能量漂移统计
+CHECKPOINT_VERSION = 1
+# 随模拟一起保存和恢复的参数
+PARAMETER_NAMES = ('num_particles', 'interaction_distance', 'box_size', 'k', 'damping',
+                   'integrator', 'compact_state', 'use_neighbor_list', 'force_kernel',
+                   'respa_steps', 'respa_split')
+
+def save_checkpoint(simulation, path):
+    """把模拟的完整状态原子地写入 path
+
+    先写入同一目录下的临时文件并刷新到磁盘，再用 os.replace 替换目标文件，
+    写入过程中被中断时原有的检查点保持完好。
+    """
+    _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    meta = {name: getattr(simulation, name) for name in PARAMETER_NAMES}
+    reference_energy = simulation.reference_energy
+    meta.update(version=CHECKPOINT_VERSION,
+                step_count=simulation.step_count,
+                reference_energy=None if reference_energy is None else float(reference_energy),
+                dissipated_energy=float(simulation.dissipated_energy),
+                potentials=simulation.potentials.specs())
+    colors = simulation.colors if simulation.colors is not None else np.zeros((0, 3))
+    topology = {}
+    if simulation.topology is not None:
+        topology = {f'topology_{name}': array for name, array in simulation.topology.to_arrays().items()}
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.checkpoint-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, positions=simulation.positions, velocities=simulation.velocities,
+                     masses=np.asarray(simulation.masses), colors=colors,
+                     rng_keys=keys, rng_pos=pos, rng_has_gauss=has_gauss,
+                     rng_cached_gaussian=cached_gaussian, meta=json.dumps(meta), **topology)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def load_checkpoint(simulation, path):
+    """从 path 恢复模拟状态 (包括全局随机数生成器)，返回恢复的步数"""
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        if meta.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"不支持的检查点版本: {meta.get('version')}")
+        for name in PARAMETER_NAMES:
+            # 较早的检查点中没有的参数保持默认值
+            if name in meta:
+                setattr(simulation, name, meta[name])
+        simulation.positions = data['positions'].copy()
+        simulation.velocities = data['velocities'].copy()
+        masses = data['masses']
+        simulation.masses = masses[()] if masses.ndim == 0 else masses.copy()
+        simulation.colors = data['colors'].copy() if len(data['colors']) else None
+        if 'topology_bonds' in data:
+            simulation.topology = Topology.from_arrays(
+                meta['num_particles'], {name: data[f'topology_{name}'] for name in TOPOLOGY_ARRAYS})
+        else:
+            simulation.topology = None
+        np.random.set_state(('MT19937', data['rng_keys'], int(data['rng_pos']),
+                             int(data['rng_has_gauss']), float(data['rng_cached_gaussian'])))
+    simulation.potentials = PotentialSet([parse_potential(spec) for spec in meta.get('potentials', [])])
+    simulation.step_count = meta['step_count']
+    simulation.reference_energy = meta['reference_energy']
+    simulation.dissipated_energy = meta['dissipated_energy']
+    # 近邻表和受力缓存按恢复后的位置重新建立
+    simulation.neighbor_list = VerletList(simulation.interaction_distance, skin=NEIGHBOR_SKIN)
+    simulation.invalidate_cache()
+    return simulation.step_count
+
+class CheckpointWriter:
+    """每隔 every 步把模拟状态保存到同一个检查点文件，中断后最多损失 every 步的计算"""
+    def __init__(self, path, every=1000):
+        self.path = path
+        self.every = every
+        self.num_saves = 0
+
+    def record(self, simulation):
+        """到达保存间隔时写入检查点，返回本次是否写入"""
+        if simulation.step_count % self.every != 0:
+            return False
+        save_checkpoint(simulation, self.path)
+        self.num_saves += 1
+        return True
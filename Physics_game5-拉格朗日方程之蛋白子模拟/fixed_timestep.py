@@ -0,0 +1,83 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import time
+
+class FixedTimestepScheduler:
+    """固定步长的物理调度器，使模拟速度与绘制帧率无关
+
+    墙钟时间累积到累加器中，每满 1 / steps_per_second 秒推进一步 dt；
+    目标速度为 frame_rate * substeps 步/秒，即每个绘制帧平均 substeps 个物理子步。
+    单帧最多追赶 max_catch_up_frames 帧的步数，超出部分直接丢弃，
+    避免计算跟不上时步数越积越多 (spiral of death)。
+    """
+    def __init__(self, dt=0.01, substeps=2, frame_rate=60.0, max_catch_up_frames=4,
+                 clock=time.perf_counter):
+        self.dt = dt
+        self.substeps = substeps
+        self.frame_rate = frame_rate
+        self.max_catch_up_frames = max_catch_up_frames
+        self.clock = clock
+        self.reset()
+
+    @property
+    def steps_per_second(self):
+        """目标物理步速"""
+        return self.frame_rate * self.substeps
+
+    @property
+    def max_steps_per_frame(self):
+        return self.substeps * self.max_catch_up_frames
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.last_time = None
+        self.total_steps = 0
+        self.dropped_steps = 0
+        self.achieved_steps_per_second = 0.0
+        self._window_start = None
+        self._window_steps = 0
+
+    def advance(self, simulation):
+        """按经过的墙钟时间推进模拟，返回本次推进的步数"""
+        now = self.clock()
+        if self.last_time is None:
+            self.last_time = now
+            self._window_start = now
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        step_interval = 1.0 / self.steps_per_second
+        steps = 0
+        while self.accumulator >= step_interval and steps < self.max_steps_per_frame:
+            simulation.update(self.dt)
+            self.accumulator -= step_interval
+            steps += 1
+
+        if self.accumulator >= step_interval:
+            # 超出追赶上限的时间不再补算
+            dropped = int(self.accumulator / step_interval)
+            self.dropped_steps += dropped
+            self.accumulator -= dropped * step_interval
+
+        self.total_steps += steps
+        self._update_rate(now, steps)
+        return steps
+
+    def _update_rate(self, now, steps):
+        """每秒统计一次实际达到的物理步速"""
+        self._window_steps += steps
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.achieved_steps_per_second = self._window_steps / elapsed
+            self._window_start = now
+            self._window_steps = 0
+
+    def stats(self):
+        return {
+            'target_steps_per_second': self.steps_per_second,
+            'achieved_steps_per_second': self.achieved_steps_per_second,
+            'total_steps': self.total_steps,
+            'dropped_steps': self.dropped_steps,
+        }
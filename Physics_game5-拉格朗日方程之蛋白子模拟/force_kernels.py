@@ -0,0 +1,253 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""可替换的弹簧力计算核
+
+每个计算核的接口相同：
+
+    kernel(positions, k, cutoff, neighbors=None, step=None) -> (受力, V, U, (i, j))
+
+受力为不含阻尼的截断弹簧力，V 为显示用的势能，U 为与受力对应的势能，
+(i, j) 为作用距离内的粒子对 (用于绘制连线)。neighbors 为可选的 VerletList，
+支持近邻表的计算核用它复用上一次构建的粒子对。运行 python force_kernels.py 对比各计算核的结果。
+"""
+
+import argparse
+import math
+import sys
+import numpy as np
+from neighbor_search import CellList
+
+# 粒子对矩阵按块处理，每块最多 PAIR_TILE_SIZE x PAIR_TILE_SIZE 对，限制临时数组的内存占用
+PAIR_TILE_SIZE = 512
+
+def iter_pair_tiles(positions, cutoff, tile_size=PAIR_TILE_SIZE):
+    """按块遍历粒子对 (只遍历 i < j 的上三角部分)
+
+    每次返回 (行切片, 列切片, 位移 r, 距离平方 d2, 截断掩码 mask)，
+    其中 r[a, b] = positions[rows][a] - positions[cols][b]。
+    """
+    n = len(positions)
+    cutoff2 = cutoff * cutoff
+    for i0 in range(0, n, tile_size):
+        rows = slice(i0, min(i0 + tile_size, n))
+        for j0 in range(i0, n, tile_size):
+            cols = slice(j0, min(j0 + tile_size, n))
+            r = positions[rows, np.newaxis, :] - positions[np.newaxis, cols, :]
+            d2 = np.einsum('ijk,ijk->ij', r, r)
+            mask = (d2 < cutoff2) & (d2 > 0)
+            if i0 == j0:
+                # 对角块只保留严格上三角，避免自身和重复的粒子对
+                mask &= np.triu(np.ones(d2.shape, dtype=bool), k=1)
+            yield rows, cols, r, d2, mask
+
+def spring_terms(positions, k, cutoff, tile_size=PAIR_TILE_SIZE):
+    """一次遍历全部粒子对，同时得到截断弹簧力、势能和作用距离内的粒子对
+
+    F_i = -sum_j k * r_ij / |r_ij|，V = sum_{i<j} 0.5 * k * |r_ij|^2 (|r_ij| < cutoff)，
+    U 为与 F 对应的势能 (见 pair_force_potential)。
+    """
+    forces = np.zeros_like(positions)
+    V = 0.0
+    U = 0.0
+    pairs_i, pairs_j = [], []
+    for rows, cols, r, d2, mask in iter_pair_tiles(positions, cutoff, tile_size):
+        if not mask.any():
+            continue
+        # 权重 w = k / |r|，截断外的粒子对权重为 0
+        w = np.zeros_like(d2)
+        w[mask] = k / np.sqrt(d2[mask])
+        # 牛顿第三定律：i 受力与 j 受力等大反向
+        forces[rows] -= np.einsum('ij,ijk->ik', w, r)
+        forces[cols] += np.einsum('ij,ijk->jk', w, r)
+        V += 0.5 * k * d2[mask].sum(dtype=np.float64)
+        U += pair_force_potential(d2[mask], k, cutoff)
+        a, b = np.nonzero(mask)
+        pairs_i.append(a + rows.start)
+        pairs_j.append(b + cols.start)
+    return forces, V, U, concatenate_pairs(pairs_i, pairs_j)
+
+def concatenate_pairs(pairs_i, pairs_j):
+    """拼接分批得到的粒子对下标"""
+    if not pairs_i:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+def pair_spring_forces(num_particles, i, j, r, d2, k):
+    """根据粒子对列表计算截断弹簧力，每对 (i, j) 只出现一次"""
+    # 作用在 i 上的力为 -k * r_ij / |r_ij|，作用在 j 上的力与之等大反向
+    f = (k / np.sqrt(d2))[:, np.newaxis] * r
+    forces = np.empty((num_particles, 3), dtype=r.dtype)
+    for axis in range(3):
+        forces[:, axis] = (np.bincount(j, f[:, axis], minlength=num_particles)
+                           - np.bincount(i, f[:, axis], minlength=num_particles))
+    return forces
+
+def pair_spring_potential(d2, k):
+    """根据粒子对距离平方计算截断弹簧势能"""
+    return 0.5 * k * d2.sum(dtype=np.float64)
+
+def pair_force_potential(d2, k, cutoff):
+    """与弹簧力 -k * r / |r| 对应的势能 U = sum k * (|r| - cutoff)
+
+    显示用的 V = 0.5 * k * |r|^2 并不是该力的势函数，检验积分器的能量守恒时使用 U；
+    减去 cutoff 使 U 在截断处连续。
+    """
+    return k * np.sum(np.sqrt(d2) - cutoff, dtype=np.float64)
+
+def python_kernel(positions, k, cutoff, neighbors=None, step=None):
+    """逐个粒子对的纯 Python 实现，速度很慢，只作为检验其他计算核的参考"""
+    n = len(positions)
+    points = positions.tolist()
+    forces = [[0.0, 0.0, 0.0] for _ in range(n)]
+    V = 0.0
+    U = 0.0
+    pairs_i, pairs_j = [], []
+    for i in range(n):
+        xi, yi, zi = points[i]
+        for j in range(i + 1, n):
+            rx, ry, rz = xi - points[j][0], yi - points[j][1], zi - points[j][2]
+            d2 = rx * rx + ry * ry + rz * rz
+            if d2 >= cutoff * cutoff or d2 == 0:
+                continue
+            d = math.sqrt(d2)
+            w = k / d
+            forces[i][0] -= w * rx
+            forces[i][1] -= w * ry
+            forces[i][2] -= w * rz
+            forces[j][0] += w * rx
+            forces[j][1] += w * ry
+            forces[j][2] += w * rz
+            V += 0.5 * k * d2
+            U += k * (d - cutoff)
+            pairs_i.append(i)
+            pairs_j.append(j)
+    pairs = (np.array(pairs_i, dtype=np.int64), np.array(pairs_j, dtype=np.int64))
+    return np.array(forces, dtype=positions.dtype).reshape(n, 3), V, U, pairs
+
+def dense_kernel(positions, k, cutoff, neighbors=None, step=None):
+    """NumPy 分块遍历全部粒子对，代价为 O(N^2)，粒子数少时开销最小"""
+    return spring_terms(positions, k, cutoff)
+
+def cell_list_kernel(positions, k, cutoff, neighbors=None, step=None):
+    """NumPy 格子划分，代价与粒子对数成线性关系；给出 VerletList 时复用缓存的近邻表"""
+    n = len(positions)
+    if neighbors is None:
+        neighbors = CellList(cutoff)
+        neighbors.build(positions, cutoff)
+        pair_batches = neighbors.iter_pairs(positions, cutoff)
+    else:
+        pair_batches = neighbors.iter_pairs(positions, cutoff, step)
+    forces = np.zeros_like(positions)
+    V = 0.0
+    U = 0.0
+    pairs_i, pairs_j = [], []
+    for i, j, r, d2 in pair_batches:
+        forces += pair_spring_forces(n, i, j, r, d2, k)
+        V += pair_spring_potential(d2, k)
+        U += pair_force_potential(d2, k, cutoff)
+        pairs_i.append(i)
+        pairs_j.append(j)
+    return forces, V, U, concatenate_pairs(pairs_i, pairs_j)
+
+def switching_function(d, r_on, r_off):
+    """在 [r_on, r_off] 内从 1 平滑降到 0 的三次切换函数，用于把受力按距离分为近程和远程两部分"""
+    x = np.clip((d - r_on) / max(r_off - r_on, 1e-12), 0.0, 1.0)
+    return 1.0 - x * x * (3.0 - 2.0 * x)
+
+def short_range_forces(positions, k, r_on, r_off, neighbors, step=None):
+    """截断弹簧力中按 switching_function 加权的近程部分，neighbors 为作用距离 r_off 的 VerletList
+
+    加权后仍是只依赖距离的中心力，近程和远程两部分各自都是保守力。
+    """
+    n = len(positions)
+    forces = np.zeros_like(positions)
+    for i, j, r, d2 in neighbors.iter_pairs(positions, r_off, step):
+        weight = k * switching_function(np.sqrt(d2), r_on, r_off)
+        forces += pair_spring_forces(n, i, j, r, d2, weight)
+    return forces
+
+FORCE_KERNELS = {
+    'python': python_kernel,
+    'dense': dense_kernel,
+    'cell_list': cell_list_kernel,
+}
+
+# 两种计算核的代价都与 N^2 成正比：稠密计算遍历全部粒子对，格子划分 (默认 dt 下近邻表几乎每步重建)
+# 的代价取决于作用距离内的粒子对数，所以分界由粒子对比例决定，而不是粒子数。
+# 整步实测：均匀分布时比例约 0.15 - 0.2 处交叉，默认边长 10 的立方体、作用距离 5 时比例约 0.3，
+# 且随粒子聚拢升到接近 1，稠密计算在各粒子数下都快约 2 倍；聚成团簇时分界略低。
+CELL_LIST_MAX_PAIR_FRACTION = 0.15
+# 粒子数很少时格子划分的固定开销占主导，不超过该值总是用稠密计算 (有近邻表时约 250 处交叉)
+DENSE_MAX_PARTICLES = 200
+DENSE_MAX_PARTICLES_WITH_NEIGHBORS = 250
+# 估计粒子对比例时抽取的粒子数；超过 PAIR_FRACTION_MAX_PARTICLES 个粒子时不再估计，直接用格子划分
+PAIR_FRACTION_SAMPLES = 32
+PAIR_FRACTION_MAX_PARTICLES = 20000
+
+def estimate_pair_fraction(positions, cutoff, samples=PAIR_FRACTION_SAMPLES):
+    """估计作用距离内的粒子对占全部粒子对的比例
+
+    按固定间隔抽取约 samples 个粒子，计算它们与所有粒子的距离，代价为 O(samples * N)，不消耗随机数。
+    """
+    n = len(positions)
+    if n < 2:
+        return 0.0
+    sample = positions[::max(1, n // samples)]
+    d = sample[:, np.newaxis, :] - positions[np.newaxis, :, :]
+    d2 = np.einsum('ijk,ijk->ij', d, d)
+    # 扣除每个抽样粒子与自身的距离 0
+    return (np.count_nonzero(d2 < cutoff * cutoff) - len(sample)) / (len(sample) * (n - 1))
+
+def choose_kernel(num_particles, has_neighbors=False, positions=None, cutoff=None):
+    """按粒子数和作用距离内的粒子对比例自动选择计算核 (不会选择纯 Python 参考实现)
+
+    不给出 positions 和 cutoff 时只按粒子数选择。
+    """
+    limit = DENSE_MAX_PARTICLES_WITH_NEIGHBORS if has_neighbors else DENSE_MAX_PARTICLES
+    if num_particles <= limit:
+        return 'dense'
+    if positions is not None and num_particles <= PAIR_FRACTION_MAX_PARTICLES:
+        if estimate_pair_fraction(positions, cutoff) > CELL_LIST_MAX_PAIR_FRACTION:
+            return 'dense'
+    return 'cell_list'
+
+def self_check(positions, k, cutoff, kernels=None, reference='python'):
+    """用 reference 计算核检验其他计算核，返回 {名称: (受力最大误差, V 误差, U 误差)}
+
+    误差为相对误差，分别以受力最大分量和能量的绝对值为尺度。
+    """
+    kernels = kernels or [name for name in FORCE_KERNELS if name != reference]
+    ref_forces, ref_V, ref_U, _ = FORCE_KERNELS[reference](positions, k, cutoff)
+    force_scale = max(np.abs(ref_forces).max(initial=0.0), 1e-12)
+    errors = {}
+    for name in kernels:
+        forces, V, U, _ = FORCE_KERNELS[name](positions, k, cutoff)
+        errors[name] = (np.abs(forces - ref_forces).max(initial=0.0) / force_scale,
+                        abs(V - ref_V) / max(abs(ref_V), 1e-12),
+                        abs(U - ref_U) / max(abs(ref_U), 1e-12))
+    return errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比各弹簧力计算核的结果")
+    parser.add_argument('--n', type=int, default=300, help="粒子数量")
+    parser.add_argument('--box', type=float, default=10.0, help="粒子分布的立方体边长")
+    parser.add_argument('--k', type=float, default=1.0, help="弹性系数")
+    parser.add_argument('--cutoff', type=float, default=5.0, help="作用距离")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    parser.add_argument('--tolerance', type=float, default=1e-9, help="允许的最大相对误差")
+    args = parser.parse_args(argv)
+
+    positions = np.random.RandomState(args.seed).rand(args.n, 3) * args.box
+    errors = self_check(positions, args.k, args.cutoff)
+    failed = False
+    for name, (force_error, V_error, U_error) in errors.items():
+        ok = max(force_error, V_error, U_error) <= args.tolerance
+        failed |= not ok
+        print(f"{name}: 受力 {force_error:.2e}  V {V_error:.2e}  U {U_error:.2e}  "
+              f"{'通过' if ok else '不一致'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
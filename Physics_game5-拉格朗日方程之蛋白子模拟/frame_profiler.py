@@ -0,0 +1,155 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import bisect
+import contextlib
+import cProfile
+import json
+import time
+
+# 直方图的区间边界 (秒)：1 微秒到 10 秒，每个数量级 10 个对数等距区间
+HISTOGRAM_EDGES = [10 ** (e / 10) for e in range(-60, 11)]
+# 按 c 键时用 cProfile 记录的帧数
+PROFILE_FRAMES = 120
+
+# 关闭计时时所有 span 共用的空上下文，不做任何计时
+_NULL_SPAN = contextlib.nullcontext()
+
+class StageHistogram:
+    """一个阶段耗时的对数区间直方图，另外记录次数、总耗时和最大值"""
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect(HISTOGRAM_EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """按直方图估计第 q 百分位数，返回所在区间的上边界 (不超过最大值，单位秒)"""
+        if self.count == 0:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                if index < len(HISTOGRAM_EDGES):
+                    return min(HISTOGRAM_EDGES[index], self.max)
+                return self.max
+        return self.max
+
+    def summary(self):
+        """耗时统计，单位为毫秒"""
+        return {
+            'count': self.count,
+            'mean_ms': 1e3 * self.total / max(self.count, 1),
+            'p50_ms': 1e3 * self.percentile(50),
+            'p95_ms': 1e3 * self.percentile(95),
+            'max_ms': 1e3 * self.max,
+        }
+
+class _Span:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.add(time.perf_counter() - self.start)
+
+class FrameProfiler:
+    """按阶段统计每帧耗时，并可用 cProfile 记录若干帧
+
+    用法：with profiler.span('draw'): ...，每帧结束时调用 end_frame()。
+    enabled 为 False 时 span 直接返回空上下文，几乎没有开销。
+    span 可以嵌套，例如 physics 中包含 forces，各阶段分别统计。
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.show_overlay = False
+        self.histograms = {}
+        self._last_frame = None
+        self._profile = None
+        self._profile_frames = 0
+        self._profile_path = None
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = StageHistogram()
+        return _Span(histogram)
+
+    def toggle(self):
+        """开关计时和屏幕叠加显示，重新开启时清空之前的统计"""
+        self.enabled = not self.enabled
+        self.show_overlay = self.enabled
+        if self.enabled:
+            self.reset()
+
+    def reset(self):
+        self.histograms = {}
+        self._last_frame = None
+
+    def end_frame(self):
+        """一帧结束：记录帧间隔，并在 cProfile 记录够帧数后写出结果"""
+        if self.enabled:
+            now = time.perf_counter()
+            if self._last_frame is not None:
+                self.histograms.setdefault('frame', StageHistogram()).add(now - self._last_frame)
+            self._last_frame = now
+        if self._profile is not None:
+            self._profile_frames -= 1
+            if self._profile_frames <= 0:
+                self.stop_profile()
+
+    def start_profile(self, path, frames=PROFILE_FRAMES):
+        """用 cProfile 记录接下来的 frames 帧，结束后写入 path (.prof)"""
+        if self._profile is not None:
+            return
+        self._profile = cProfile.Profile()
+        self._profile_frames = frames
+        self._profile_path = path
+        self._profile.enable()
+
+    def stop_profile(self):
+        if self._profile is None:
+            return
+        self._profile.disable()
+        self._profile.dump_stats(self._profile_path)
+        print(f"cProfile 结果已保存到 {self._profile_path}")
+        self._profile = None
+
+    @property
+    def profiling(self):
+        return self._profile is not None
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def overlay_lines(self):
+        """屏幕叠加显示的文本，每个阶段一行 (GLUT 位图字体只能显示 ASCII 字符)"""
+        lines = [f"{'stage':<14}{'mean':>7}{'p95':>8}{'max':>8}  (ms)"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<14}{stats['mean_ms']:>7.2f}{stats['p95_ms']:>8.2f}"
+                         f"{stats['max_ms']:>8.2f}")
+        return lines
+
+    def dump(self, path):
+        """把各阶段的统计和直方图写入 JSON 文件"""
+        report = {
+            'histogram_edges_s': HISTOGRAM_EDGES,
+            'stages': {name: dict(histogram.summary(), counts=histogram.counts)
+                       for name, histogram in sorted(self.histograms.items())},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"帧耗时统计已保存到 {path}")
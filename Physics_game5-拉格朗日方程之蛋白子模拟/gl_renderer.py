@@ -0,0 +1,184 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+
+PARTICLE_RADIUS = 0.3
+# 球体细分等级 (经线数, 纬线数)，依次用于近、中、远距离的粒子
+SPHERE_LODS = [(16, 16), (10, 10), (6, 6)]
+# 到相机的距离小于这些值时分别使用前两个细分等级，更远的使用最粗的等级
+LOD_DISTANCES = [20.0, 40.0]
+
+VERTEX_SHADER = """
+#version 120
+attribute vec3 vertex;
+attribute vec3 offset;
+attribute vec3 color;
+uniform float radius;
+varying vec3 v_color;
+varying vec3 v_normal;
+varying vec3 v_eye;
+void main() {
+    vec4 eye = gl_ModelViewMatrix * vec4(offset + radius * vertex, 1.0);
+    v_eye = eye.xyz;
+    v_normal = gl_NormalMatrix * vertex;
+    v_color = color;
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 v_color;
+varying vec3 v_normal;
+varying vec3 v_eye;
+void main() {
+    vec3 light = normalize(gl_LightSource[0].position.xyz - v_eye);
+    float diffuse = max(dot(normalize(v_normal), light), 0.0);
+    gl_FragColor = vec4(v_color * (0.2 + 0.8 * diffuse), 1.0);
+}
+"""
+
+def sphere_mesh(slices, stacks):
+    """单位球面网格，返回 (顶点 float32[V, 3], 三角形下标 uint32[T * 3])，顶点同时作为法向量"""
+    theta = np.linspace(0, np.pi, stacks + 1)
+    phi = np.linspace(0, 2 * np.pi, slices + 1)
+    theta, phi = np.meshgrid(theta, phi, indexing='ij')
+    vertices = np.stack([np.sin(theta) * np.cos(phi),
+                         np.sin(theta) * np.sin(phi),
+                         np.cos(theta)], axis=-1).reshape(-1, 3).astype(np.float32)
+    row = np.arange(stacks)[:, np.newaxis] * (slices + 1)
+    col = np.arange(slices)[np.newaxis, :]
+    a = (row + col).ravel()
+    b = a + slices + 1
+    indices = np.stack([a, b, a + 1, a + 1, b, b + 1], axis=1).ravel().astype(np.uint32)
+    return vertices, indices
+
+class InstancedRenderer:
+    """把粒子位置和颜色每帧上传到顶点缓冲，用实例化绘制球体，用一次 GL_LINES 绘制全部连线
+
+    粒子按到相机的距离分成几个细分等级，每个等级一次 glDrawElementsInstanced。
+    需要支持 GLSL 1.20 和实例化绘制的 OpenGL 环境，见 create_renderer。
+    """
+    def __init__(self):
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+        self.vertex_location = glGetAttribLocation(self.program, 'vertex')
+        self.offset_location = glGetAttribLocation(self.program, 'offset')
+        self.color_location = glGetAttribLocation(self.program, 'color')
+        self.radius_location = glGetUniformLocation(self.program, 'radius')
+
+        # 各细分等级的球体网格只上传一次
+        self.meshes = []
+        for slices, stacks in SPHERE_LODS:
+            vertices, indices = sphere_mesh(slices, stacks)
+            vertex_buffer, index_buffer = glGenBuffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+            glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+            self.meshes.append((vertex_buffer, index_buffer, len(indices)))
+
+        self.position_buffer, self.color_buffer, self.bond_buffer = glGenBuffers(3)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def lod_levels(self, positions):
+        """根据当前模型视图矩阵计算每个粒子到相机的距离，返回细分等级"""
+        modelview = np.array(glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float32).reshape(4, 4)
+        # OpenGL 矩阵按列存储，按行读取后行向量右乘即为变换
+        eye = positions @ modelview[:3, :3] + modelview[3, :3]
+        distance = np.sqrt(np.einsum('ij,ij->i', eye, eye))
+        return np.searchsorted(LOD_DISTANCES, distance)
+
+    def upload(self, buffer, target, data):
+        """每帧重新分配缓冲 (orphaning) 后上传数据，避免等待上一帧的绘制"""
+        glBindBuffer(target, buffer)
+        glBufferData(target, data.nbytes, None, GL_STREAM_DRAW)
+        glBufferSubData(target, 0, data.nbytes, data)
+
+    def draw(self, positions, colors, bond_pairs):
+        if len(positions) == 0:
+            return
+        positions = np.asarray(positions, dtype=np.float32)
+        colors = np.asarray(colors, dtype=np.float32)
+
+        # 按细分等级排序，使每个等级的实例在缓冲中连续
+        levels = self.lod_levels(positions)
+        order = np.argsort(levels, kind='stable')
+        counts = np.bincount(levels, minlength=len(self.meshes))
+        sorted_positions = np.ascontiguousarray(positions[order])
+        self.upload(self.position_buffer, GL_ARRAY_BUFFER, sorted_positions)
+        self.upload(self.color_buffer, GL_ARRAY_BUFFER, np.ascontiguousarray(colors[order]))
+
+        self.draw_spheres(counts)
+
+        # 连线下标换算到排序后的顺序，复用同一个位置缓冲
+        i, j = bond_pairs
+        if len(i):
+            rank = np.empty(len(order), dtype=np.uint32)
+            rank[order] = np.arange(len(order), dtype=np.uint32)
+            bonds = np.stack([rank[i], rank[j]], axis=1).ravel()
+            self.upload(self.bond_buffer, GL_ELEMENT_ARRAY_BUFFER, bonds)
+            self.draw_bonds(len(bonds))
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def draw_spheres(self, counts):
+        glUseProgram(self.program)
+        glUniform1f(self.radius_location, PARTICLE_RADIUS)
+        glEnableVertexAttribArray(self.vertex_location)
+        glEnableVertexAttribArray(self.offset_location)
+        glEnableVertexAttribArray(self.color_location)
+        glVertexAttribDivisor(self.offset_location, 1)
+        glVertexAttribDivisor(self.color_location, 1)
+
+        start = 0
+        for (vertex_buffer, index_buffer, num_indices), count in zip(self.meshes, counts):
+            if count:
+                glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+                glVertexAttribPointer(self.vertex_location, 3, GL_FLOAT, GL_FALSE, 0, None)
+                # 实例属性从本等级第一个粒子处开始读取
+                glBindBuffer(GL_ARRAY_BUFFER, self.position_buffer)
+                glVertexAttribPointer(self.offset_location, 3, GL_FLOAT, GL_FALSE, 0,
+                                      ctypes.c_void_p(start * 12))
+                glBindBuffer(GL_ARRAY_BUFFER, self.color_buffer)
+                glVertexAttribPointer(self.color_location, 3, GL_FLOAT, GL_FALSE, 0,
+                                      ctypes.c_void_p(start * 12))
+                glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+                glDrawElementsInstanced(GL_TRIANGLES, num_indices, GL_UNSIGNED_INT, None, int(count))
+            start += count
+
+        glVertexAttribDivisor(self.offset_location, 0)
+        glVertexAttribDivisor(self.color_location, 0)
+        glDisableVertexAttribArray(self.vertex_location)
+        glDisableVertexAttribArray(self.offset_location)
+        glDisableVertexAttribArray(self.color_location)
+        glUseProgram(0)
+
+    def draw_bonds(self, num_indices):
+        glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+        glDisable(GL_LIGHTING)
+        glColor3f(0.5, 0.5, 0.5)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, self.position_buffer)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.bond_buffer)
+        glDrawElements(GL_LINES, num_indices, GL_UNSIGNED_INT, None)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glPopAttrib()
+
+def create_renderer():
+    """创建实例化渲染器；OpenGL 环境不支持着色器或实例化绘制时返回 None"""
+    if not (bool(glDrawElementsInstanced) and bool(glVertexAttribDivisor)):
+        return None
+    try:
+        return InstancedRenderer()
+    except Exception:
+        return None
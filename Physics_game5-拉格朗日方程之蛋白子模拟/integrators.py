@@ -0,0 +1,95 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import numpy as np
+
+# 每个积分器推进 simulation 一个时间步 dt，返回本步被阻尼耗散的能量，
+# 用于在有阻尼时检验能量守恒 (能量漂移 = T + U + 耗散能量 的相对变化)。
+# simulation 需提供 positions、velocities、mass_column()、damping_column()、
+# calculate_forces()、calculate_spring_forces()、calculate_kinetic_energy()、
+# calculate_damping_power() 和 invalidate_cache()，
+# ProteinPhysics 和 ReplicaEnsemble (多副本，能量按副本返回数组) 都满足该接口。
+# 多时间步积分 respa_step 另外需要 respa_steps、calculate_fast_forces() 和 calculate_slow_forces()，
+# 只有 ProteinPhysics 提供。
+
+def semi_implicit_euler_step(simulation, dt):
+    """半隐式 (辛) 欧拉：先用当前受力更新速度，再用新速度更新位置"""
+    inv_mass = 1.0 / simulation.mass_column()
+    simulation.velocities += simulation.calculate_forces() * dt * inv_mass
+    simulation.positions += simulation.velocities * dt
+    simulation.invalidate_cache()
+    return simulation.calculate_damping_power() * dt
+
+def velocity_verlet_step(simulation, dt):
+    """速度 Verlet：半步速度 - 整步位置 - 新位置受力的半步速度
+
+    阻尼力按两次半步更新时的速度显式计算，只有一阶精度。
+    """
+    inv_mass = 1.0 / simulation.mass_column()
+    simulation.velocities += 0.5 * dt * simulation.calculate_forces() * inv_mass
+    simulation.positions += simulation.velocities * dt
+    simulation.invalidate_cache()
+    dissipated = simulation.calculate_damping_power() * dt
+    simulation.velocities += 0.5 * dt * simulation.calculate_forces() * inv_mass
+    return dissipated
+
+def damped_verlet_step(simulation, dt):
+    """带阻尼的速度 Verlet：阻尼半步 - Verlet 整步 - 阻尼半步 (Strang 分裂)
+
+    阻尼项 dv/dt = -damping * v / m 按指数衰减精确求解，
+    保守力部分仍是辛的速度 Verlet，damping = 0 时与速度 Verlet 完全一致。
+    """
+    inv_mass = 1.0 / simulation.mass_column()
+    decay = np.exp(-0.5 * dt * simulation.damping_column() * inv_mass)
+    # 两次阻尼半步各自减少的动能即为本步耗散的能量
+    dissipated = simulation.calculate_kinetic_energy()
+    simulation.velocities *= decay
+    dissipated -= simulation.calculate_kinetic_energy()
+    simulation.velocities += 0.5 * dt * simulation.calculate_spring_forces() * inv_mass
+    simulation.positions += simulation.velocities * dt
+    simulation.invalidate_cache()
+    simulation.velocities += 0.5 * dt * simulation.calculate_spring_forces() * inv_mass
+    dissipated += simulation.calculate_kinetic_energy()
+    simulation.velocities *= decay
+    dissipated -= simulation.calculate_kinetic_energy()
+    return dissipated
+
+def respa_step(simulation, dt):
+    """多时间步 (RESPA) 积分：dt 为外层步长，近程的刚性力以 dt / respa_steps 的内层步长积分
+
+    远程慢变力在外层步的首尾各作用半步，每个外层步只计算一次完整的受力；
+    内层每步只计算近程力 (和成键力)。阻尼与 damped_verlet_step 一样在外层首尾按指数精确衰减。
+    """
+    inv_mass = 1.0 / simulation.mass_column()
+    decay = np.exp(-0.5 * dt * simulation.damping_column() * inv_mass)
+    inner_dt = dt / simulation.respa_steps
+    dissipated = simulation.calculate_kinetic_energy()
+    simulation.velocities *= decay
+    dissipated -= simulation.calculate_kinetic_energy()
+    simulation.velocities += 0.5 * dt * simulation.calculate_slow_forces() * inv_mass
+    for _ in range(simulation.respa_steps):
+        simulation.velocities += 0.5 * inner_dt * simulation.calculate_fast_forces() * inv_mass
+        simulation.positions += simulation.velocities * inner_dt
+        simulation.invalidate_cache()
+        simulation.velocities += 0.5 * inner_dt * simulation.calculate_fast_forces() * inv_mass
+    simulation.velocities += 0.5 * dt * simulation.calculate_slow_forces() * inv_mass
+    dissipated += simulation.calculate_kinetic_energy()
+    simulation.velocities *= decay
+    dissipated -= simulation.calculate_kinetic_energy()
+    return dissipated
+
+# 可选的积分方法，键为 ProteinSimulation.integrator 的取值
+INTEGRATORS = {
+    'euler': semi_implicit_euler_step,
+    'verlet': velocity_verlet_step,
+    'damped_verlet': damped_verlet_step,
+    'respa': respa_step,
+}
+
+INTEGRATOR_NAMES = {
+    'euler': '半隐式欧拉',
+    'verlet': '速度 Verlet',
+    'damped_verlet': '阻尼 Verlet',
+    'respa': '多时间步 RESPA',
+}
@@ -0,0 +1,61 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""检验 force_kernel = 'auto' 时自动选择的计算核
+
+默认配置 (边长 10 的立方体、作用距离 5) 下作用距离内的粒子对比例约 0.3，
+稠密计算在各粒子数下都更快；立方体边长随粒子数增大 (保持默认密度) 时，
+超过几百个粒子后应选择格子划分。任一项不符时返回非零退出码：
+
+    python kernel_choice_check.py
+"""
+
+import argparse
+import sys
+import numpy as np
+from protein_physics import ProteinPhysics
+
+# (粒子数, 立方体边长, 期望的计算核)，边长为 None 表示默认边长
+EXPECTED_CHOICES = [
+    (100, None, 'dense'),
+    (300, None, 'dense'),
+    (500, None, 'dense'),
+    (1000, None, 'dense'),
+    (2000, None, 'dense'),
+    (500, 10.0 * 5 ** (1 / 3), 'cell_list'),
+    (1000, 10.0 * 10 ** (1 / 3), 'cell_list'),
+    (2000, 10.0 * 20 ** (1 / 3), 'cell_list'),
+]
+
+def chosen_kernel(n, box=None, use_neighbor_list=True, seed=0):
+    """按默认参数初始化 n 个粒子，返回自动选择的计算核"""
+    simulation = ProteinPhysics()
+    simulation.num_particles = n
+    if box is not None:
+        simulation.box_size = box
+    simulation.use_neighbor_list = use_neighbor_list
+    np.random.seed(seed)
+    simulation.reset_simulation()
+    kernel = simulation.active_kernel()
+    simulation.close()
+    return kernel
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="检验自动选择的弹簧力计算核")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for use_neighbor_list in (True, False):
+        for n, box, expected in EXPECTED_CHOICES:
+            kernel = chosen_kernel(n, box, use_neighbor_list, args.seed)
+            ok = kernel == expected
+            failed |= not ok
+            box_label = '默认' if box is None else f'{box:.1f}'
+            print(f"N={n} 边长={box_label} 近邻表={'开' if use_neighbor_list else '关'}: "
+                  f"{kernel} (期望 {expected})  {'通过' if ok else '不符'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import numpy as np
+
+# 每批生成的候选粒子对数量上限，限制临时数组的内存占用
+PAIR_CHUNK_SIZE = 1 << 20
+
+# 半壳层邻居偏移：13 个方向 + 自身格子，每对相邻格子只访问一次
+HALF_SHELL_OFFSETS = [(0, 0, 0)] + [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1)
+    for dy in (-1, 0, 1)
+    for dz in (-1, 0, 1)
+    if (dx, dy, dz) > (0, 0, 0)
+]
+
+class CellList:
+    """以截断距离为格子边长的均匀网格 (cell list)
+
+    每一步把粒子分桶到格子中，只在相邻的 27 个格子之间寻找粒子对，
+    粒子密度固定时寻找近邻的代价与粒子数成线性关系。
+    """
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.num_builds = 0
+        self.num_particles = 0
+        self.order = np.zeros(0, dtype=np.int64)
+        self._reset_cell_pairs()
+
+    def _reset_cell_pairs(self):
+        self.cell_start_a = np.zeros(0, dtype=np.int64)
+        self.cell_start_b = np.zeros(0, dtype=np.int64)
+        self.cell_count_b = np.zeros(0, dtype=np.int64)
+        self.same_cell = np.zeros(0, dtype=bool)
+        self.candidate_begin = np.zeros(0, dtype=np.int64)
+        self.candidate_end = np.zeros(0, dtype=np.int64)
+
+    def build(self, positions, cell_size=None):
+        """把粒子分桶到格子中；cell_size 改变时 (作用距离被修改) 按新的格子边长重建"""
+        if cell_size is not None:
+            self.cell_size = cell_size
+        self.num_builds += 1
+        self.num_particles = len(positions)
+        if self.num_particles == 0:
+            self.order = np.zeros(0, dtype=np.int64)
+            self._reset_cell_pairs()
+            return
+
+        # 整数格子坐标，四周各留一圈空格子，使邻居偏移不会跨行回绕
+        coords = np.floor((positions - positions.min(axis=0)) / self.cell_size).astype(np.int64) + 1
+        dims = coords.max(axis=0) + 2
+        strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+        keys = coords @ strides
+
+        # 按格子编号排序，每个非空格子对应 order 中的一段连续区间
+        self.order = np.argsort(keys, kind='stable')
+        cells, starts, counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+        # 枚举所有相邻的非空格子对
+        start_a, start_b, count_a, count_b, same = [], [], [], [], []
+        for offset in HALF_SHELL_OFFSETS:
+            neighbor = cells + np.dot(offset, strides)
+            idx = np.searchsorted(cells, neighbor)
+            idx[idx == len(cells)] = 0
+            found = cells[idx] == neighbor
+            start_a.append(starts[found])
+            count_a.append(counts[found])
+            start_b.append(starts[idx[found]])
+            count_b.append(counts[idx[found]])
+            same.append(np.full(found.sum(), offset == (0, 0, 0)))
+
+        self.cell_start_a = np.concatenate(start_a)
+        self.cell_start_b = np.concatenate(start_b)
+        self.cell_count_b = np.concatenate(count_b)
+        self.same_cell = np.concatenate(same)
+        # 第 p 个格子对的候选粒子对编号区间为 [candidate_begin[p], candidate_end[p])
+        num_candidates = np.concatenate(count_a) * self.cell_count_b
+        self.candidate_end = np.cumsum(num_candidates)
+        self.candidate_begin = self.candidate_end - num_candidates
+
+    @property
+    def num_candidates(self):
+        """相邻格子之间的候选粒子对总数"""
+        return int(self.candidate_end[-1]) if len(self.candidate_end) else 0
+
+    def iter_candidate_pairs(self, chunk_size=PAIR_CHUNK_SIZE):
+        """分批返回相邻格子之间的候选粒子对 (i, j)，每对只出现一次"""
+        for t0 in range(0, self.num_candidates, chunk_size):
+            t = np.arange(t0, min(t0 + chunk_size, self.num_candidates), dtype=np.int64)
+            p = np.searchsorted(self.candidate_end, t, side='right')
+            local = t - self.candidate_begin[p]
+            count_b = self.cell_count_b[p]
+            a = local // count_b
+            b = local % count_b
+            # 同一格子内只保留 a < b，去掉自身和重复的粒子对
+            keep = ~self.same_cell[p] | (a < b)
+            i = self.order[self.cell_start_a[p][keep] + a[keep]]
+            j = self.order[self.cell_start_b[p][keep] + b[keep]]
+            yield i, j
+
+    def iter_pairs(self, positions, cutoff, chunk_size=PAIR_CHUNK_SIZE):
+        """分批返回距离小于 cutoff 的粒子对 (i, j, r_ij, d2)，r_ij = positions[i] - positions[j]"""
+        cutoff2 = cutoff * cutoff
+        for i, j in self.iter_candidate_pairs(chunk_size):
+            r = positions[i] - positions[j]
+            d2 = np.einsum('ij,ij->i', r, r)
+            mask = (d2 < cutoff2) & (d2 > 0)
+            yield i[mask], j[mask], r[mask], d2[mask]
+
+class VerletList:
+    """带缓冲层 (skin) 的 Verlet 近邻表
+
+    保存距离小于 cutoff + skin 的所有粒子对，只有当某个粒子自上次构建以来
+    的位移超过 skin / 2 时才重新构建，其余步只需遍历缓存的粒子对。
+    """
+    def __init__(self, cutoff, skin=0.5):
+        self.cutoff = cutoff
+        self.skin = skin
+        self.cell_list = CellList(cutoff + skin)
+        self.i = np.zeros(0, dtype=np.int64)
+        self.j = np.zeros(0, dtype=np.int64)
+        self.reference_positions = None
+        self.num_rebuilds = 0
+        self._num_timed_rebuilds = 0
+        self.first_rebuild_step = None
+        self.last_rebuild_step = None
+        self.last_rebuild_interval = None
+
+    def needs_rebuild(self, positions, cutoff):
+        """粒子数或作用距离改变，或最大位移超过 skin / 2 时需要重建"""
+        if self.reference_positions is None or len(positions) != len(self.reference_positions):
+            return True
+        if cutoff != self.cutoff:
+            return True
+        displacement = positions - self.reference_positions
+        max_disp2 = np.einsum('ij,ij->i', displacement, displacement).max(initial=0.0)
+        return max_disp2 > (0.5 * self.skin) ** 2
+
+    def rebuild(self, positions, cutoff, step=None):
+        """借助格子划分重新收集距离小于 cutoff + skin 的粒子对"""
+        self.cutoff = cutoff
+        self.cell_list.build(positions, cutoff + self.skin)
+        pairs = [(i, j) for i, j, _, _ in self.cell_list.iter_pairs(positions, cutoff + self.skin)]
+        # 粒子编号用 int32 存储，减少每步遍历近邻表时的内存带宽
+        index_dtype = np.int32 if len(positions) < 2**31 else np.int64
+        self.i = np.concatenate([i for i, _ in pairs] or [[]]).astype(index_dtype)
+        self.j = np.concatenate([j for _, j in pairs] or [[]]).astype(index_dtype)
+        self.reference_positions = positions.copy()
+
+        self.num_rebuilds += 1
+        if step is not None:
+            if self.last_rebuild_step is not None:
+                self.last_rebuild_interval = step - self.last_rebuild_step
+            if self.first_rebuild_step is None:
+                self.first_rebuild_step = step
+            self.last_rebuild_step = step
+            self._num_timed_rebuilds += 1
+
+    def update(self, positions, cutoff, step=None):
+        """必要时重建近邻表，返回本次是否重建"""
+        if self.needs_rebuild(positions, cutoff):
+            self.rebuild(positions, cutoff, step)
+            return True
+        return False
+
+    def iter_pairs(self, positions, cutoff, step=None, chunk_size=PAIR_CHUNK_SIZE):
+        """分批返回缓存粒子对中距离小于 cutoff 的部分 (i, j, r_ij, d2)，必要时先重建"""
+        self.update(positions, cutoff, step)
+        cutoff2 = cutoff * cutoff
+        for start in range(0, len(self.i), chunk_size):
+            i = self.i[start:start + chunk_size]
+            j = self.j[start:start + chunk_size]
+            r = positions[i] - positions[j]
+            d2 = np.einsum('ij,ij->i', r, r)
+            mask = (d2 < cutoff2) & (d2 > 0)
+            yield i[mask], j[mask], r[mask], d2[mask]
+
+    @property
+    def num_pairs(self):
+        return len(self.i)
+
+    @property
+    def mean_rebuild_interval(self):
+        """两次重建之间的平均步数"""
+        if self._num_timed_rebuilds < 2:
+            return None
+        return (self.last_rebuild_step - self.first_rebuild_step) / (self._num_timed_rebuilds - 1)
+
+    def stats(self):
+        """近邻表统计信息，用于调节 skin"""
+        return {
+            'skin': self.skin,
+            'pairs': self.num_pairs,
+            'rebuilds': self.num_rebuilds,
+            'last_rebuild_interval': self.last_rebuild_interval,
+            'mean_rebuild_interval': self.mean_rebuild_interval,
+        }
@@ -0,0 +1,116 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from neighbor_search import CellList
+
+# 工作进程中附加的共享内存数组，由 _init_worker 设置
+_worker_arrays = {}
+
+def _init_worker(positions_name, forces_name, capacity, dtype):
+    positions_shm = shared_memory.SharedMemory(name=positions_name)
+    forces_shm = shared_memory.SharedMemory(name=forces_name)
+    _worker_arrays['shm'] = (positions_shm, forces_shm)
+    _worker_arrays['positions'] = np.ndarray((capacity, 3), dtype=dtype, buffer=positions_shm.buf)
+    _worker_arrays['forces'] = np.ndarray((capacity, 3), dtype=dtype, buffer=forces_shm.buf)
+
+def _slab_forces(task):
+    """计算 x 坐标落在 [lo, hi) 内的粒子 (本进程负责的粒子) 所受的弹簧力
+
+    本区域两侧各扩展 cutoff 作为边界层，边界层粒子只提供作用力，不写回受力；
+    每个粒子只属于一个区域，不同进程写入共享受力数组的行互不重叠，无需加锁。
+    返回本区域分摊的势能 (V, U)，跨区域粒子对的能量各分一半。
+    """
+    n, lo, hi, k, cutoff = task
+    positions = _worker_arrays['positions'][:n]
+    forces = _worker_arrays['forces'][:n]
+    x = positions[:, 0]
+    local = np.nonzero((x >= lo - cutoff) & (x < hi + cutoff))[0]
+    local_positions = positions[local]
+    owned = (local_positions[:, 0] >= lo) & (local_positions[:, 0] < hi)
+
+    local_forces = np.zeros((len(local), 3))
+    V = 0.0
+    U = 0.0
+    cell_list = CellList(cutoff)
+    cell_list.build(local_positions, cutoff)
+    for a, b, r, d2 in cell_list.iter_pairs(local_positions, cutoff):
+        keep = owned[a] | owned[b]
+        a, b, r, d2 = a[keep], b[keep], r[keep], d2[keep]
+        # 两端都属于本区域的粒子对能量全部计入，跨区域的只计一半
+        share = 0.5 * (owned[a].astype(np.float64) + owned[b])
+        V += 0.5 * k * np.sum(share * d2)
+        U += k * np.sum(share * (np.sqrt(d2) - cutoff))
+        f = (k / np.sqrt(d2))[:, np.newaxis] * r
+        for axis in range(3):
+            local_forces[:, axis] += (np.bincount(b, f[:, axis], minlength=len(local))
+                                      - np.bincount(a, f[:, axis], minlength=len(local)))
+    forces[local[owned]] = local_forces[owned]
+    return V, U
+
+class ParallelForceBackend:
+    """基于共享内存进程池的多核弹簧力计算
+
+    每步按 x 坐标的分位数把粒子划分成 num_workers 个空间区域，
+    父进程把位置写入共享内存，工作进程直接读取并把各自区域的受力写入共享受力数组，
+    每步只在进程间传递区域边界和参数这几个标量。
+    """
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+        self.capacity = 0
+        self.dtype = None
+        self._pool = None
+        self._shm = ()
+        self.positions = None
+        self.forces = None
+
+    def _allocate(self, capacity, dtype):
+        """按容量 (粒子数) 分配共享内存并启动进程池"""
+        self.close()
+        nbytes = max(capacity * 3 * np.dtype(dtype).itemsize, 1)
+        positions_shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        forces_shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._shm = (positions_shm, forces_shm)
+        self.positions = np.ndarray((capacity, 3), dtype=dtype, buffer=positions_shm.buf)
+        self.forces = np.ndarray((capacity, 3), dtype=dtype, buffer=forces_shm.buf)
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self._pool = mp.Pool(self.num_workers, initializer=_init_worker,
+                             initargs=(positions_shm.name, forces_shm.name, capacity, self.dtype))
+
+    def compute(self, positions, k, cutoff):
+        """返回 (受力, V, U)，受力为不含阻尼的保守弹簧力"""
+        n = len(positions)
+        if n > self.capacity or positions.dtype != self.dtype:
+            # 容量按两倍增长，粒子数小幅变化时不必重启进程池
+            self._allocate(max(n, 2 * self.capacity), positions.dtype)
+        self.positions[:n] = positions
+
+        # 按 x 坐标分位数划分区域，使每个进程负责的粒子数大致相同
+        bounds = np.quantile(positions[:, 0], np.linspace(0, 1, self.num_workers + 1)[1:-1]) if n else []
+        edges = [-np.inf, *bounds, np.inf]
+        tasks = [(n, edges[w], edges[w + 1], k, cutoff) for w in range(self.num_workers)]
+        V = 0.0
+        U = 0.0
+        for slab_V, slab_U in self._pool.map(_slab_forces, tasks):
+            V += slab_V
+            U += slab_U
+        return self.forces[:n].copy(), V, U
+
+    def close(self):
+        """结束进程池并释放共享内存"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        # 先释放对共享内存缓冲区的引用，才能关闭共享内存
+        self.positions = None
+        self.forces = None
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+        self._shm = ()
+        self.capacity = 0
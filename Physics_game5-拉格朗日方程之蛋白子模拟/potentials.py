@@ -0,0 +1,182 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""查表计算的非键对势：Lennard-Jones、软球和屏蔽库仑 (Yukawa)
+
+各势函数在 [0, cutoff^2] 上按 r^2 等距的格点预先计算能量 E 和 F/r，合成两张查找表，
+计算时用 r^2 线性插值，内层循环不需要开方、乘方和指数运算。
+粒子 i 受力为 (F/r) * r_ij，其中 r_ij = x_i - x_j。能量平移使 E(cutoff) = 0，
+距离小于 r_min 时受力大小固定为 r_min 处的值，避免 r -> 0 时发散。
+
+势函数用字符串描述，例如 "lennard_jones:epsilon=1,sigma=1,cutoff=2.5"，参数见 POTENTIALS。
+"""
+
+import numpy as np
+from force_kernels import switching_function
+from neighbor_search import VerletList
+
+TABLE_POINTS = 1 << 14
+# 势函数专用近邻表的缓冲层厚度
+POTENTIAL_SKIN = 0.3
+
+def lennard_jones(r, epsilon=1.0, sigma=1.0):
+    """E = 4 epsilon ((sigma / r)^12 - (sigma / r)^6)，返回 (E, F/r)"""
+    s6 = (sigma / r) ** 6
+    energy = 4.0 * epsilon * (s6 * s6 - s6)
+    return energy, 24.0 * epsilon * (2.0 * s6 * s6 - s6) / r**2
+
+def soft_sphere(r, epsilon=1.0, sigma=1.0, n=12):
+    """纯排斥的软球 E = epsilon (sigma / r)^n"""
+    energy = epsilon * (sigma / r) ** n
+    return energy, n * energy / r**2
+
+def screened_coulomb(r, strength=1.0, screening_length=1.0):
+    """屏蔽库仑 (Yukawa) E = strength * exp(-r / lambda) / r，strength = q_i q_j / (4 pi eps0)"""
+    energy = strength * np.exp(-r / screening_length) / r
+    return energy, energy * (1.0 / r + 1.0 / screening_length) / r
+
+# 名称: (势函数, 默认参数 (包括截断距离和最小距离))
+POTENTIALS = {
+    'lennard_jones': (lennard_jones, {'epsilon': 1.0, 'sigma': 1.0, 'cutoff': 2.5, 'r_min': 0.6}),
+    'soft_sphere': (soft_sphere, {'epsilon': 1.0, 'sigma': 1.0, 'n': 12, 'cutoff': 2.0, 'r_min': 0.5}),
+    'screened_coulomb': (screened_coulomb, {'strength': 1.0, 'screening_length': 1.0,
+                                            'cutoff': 4.0, 'r_min': 0.3}),
+}
+
+class TabulatedPotential:
+    """一个截断对势，由 table 在给定的 r^2 格点上生成查找表"""
+    def __init__(self, name, **params):
+        if name not in POTENTIALS:
+            raise ValueError(f"未知的势函数: {name}")
+        func, defaults = POTENTIALS[name]
+        unknown = set(params) - set(defaults)
+        if unknown:
+            raise ValueError(f"{name} 没有参数: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.func = func
+        self.params = dict(defaults, **params)
+        self.cutoff = float(self.params['cutoff'])
+        self.r_min = float(self.params['r_min'])
+        self.shape = {key: value for key, value in self.params.items() if key not in ('cutoff', 'r_min')}
+
+    def table(self, d2):
+        """在 r^2 格点 d2 上计算 (E, F/r)，截断距离以外为 0
+
+        r_min 以内受力大小固定为 r_min 处的值，能量随之线性增加，受力与能量保持一致。
+        """
+        r = np.sqrt(d2)
+        energy, force_over_r = self.func(np.maximum(r, self.r_min), **self.shape)
+        min_energy, min_force_over_r = self.func(np.array(self.r_min), **self.shape)
+        min_force = min_force_over_r * self.r_min
+        core = r < self.r_min
+        energy = np.where(core, min_energy + min_force * (self.r_min - r), energy)
+        force_over_r = np.where(core, min_force / np.maximum(r, 1e-3 * self.r_min), force_over_r)
+        cutoff_energy, _ = self.func(np.array(self.cutoff), **self.shape)
+        inside = d2 < self.cutoff**2
+        return np.where(inside, energy - cutoff_energy, 0.0), np.where(inside, force_over_r, 0.0)
+
+    def spec(self):
+        """可用 parse_potential 还原的字符串描述"""
+        return self.name + ':' + ','.join(f"{key}={float(value)!r}" for key, value in self.params.items())
+
+class PotentialSet:
+    """多个查表对势的组合
+
+    各势函数在同一组 r^2 格点上制表后相加成一张总表，每个粒子对只插值一次。
+    使用自己的 Verlet 近邻表 (作用距离为最大的截断距离)，与弹簧力的近邻表互不影响。
+    """
+    def __init__(self, potentials=()):
+        self.potentials = list(potentials)
+        self.neighbor_list = VerletList(0.0, skin=POTENTIAL_SKIN)
+        self.version = 0
+        self._build_table()
+
+    def __len__(self):
+        return len(self.potentials)
+
+    def add(self, potential):
+        self.potentials.append(potential)
+        self._build_table()
+
+    def remove(self, name):
+        """去掉所有名为 name 的势函数"""
+        self.potentials = [p for p in self.potentials if p.name != name]
+        self._build_table()
+
+    def clear(self):
+        self.potentials = []
+        self._build_table()
+
+    def _build_table(self):
+        """在 [0, 最大截断距离^2] 上按 r^2 等距生成总表"""
+        self.cutoff = max((p.cutoff for p in self.potentials), default=0.0)
+        d2 = np.linspace(0.0, self.cutoff**2, TABLE_POINTS)
+        # 末尾多一个为 0 的表项，r^2 舍入到表末尾时插值不越界
+        self.energy_table = np.zeros(TABLE_POINTS + 1)
+        self.force_table = np.zeros(TABLE_POINTS + 1)
+        for p in self.potentials:
+            energy, force_over_r = p.table(d2)
+            self.energy_table[:-1] += energy
+            self.force_table[:-1] += force_over_r
+        self.inv_spacing = (TABLE_POINTS - 1) / self.cutoff**2 if self.cutoff > 0 else 0.0
+        # 每次修改势函数后递增，ProteinPhysics 据此判断受力缓存是否失效
+        self.version += 1
+
+    def lookup(self, d2):
+        """对一批粒子对的 r^2 线性插值，返回 (E, F/r)"""
+        x = d2 * self.inv_spacing
+        index = x.astype(np.int64)
+        t = x - index
+        energy = self.energy_table[index] * (1.0 - t) + self.energy_table[index + 1] * t
+        force_over_r = self.force_table[index] * (1.0 - t) + self.force_table[index + 1] * t
+        return energy, force_over_r
+
+    def terms(self, positions, step=None):
+        """所有查表对势的 (受力, 能量)"""
+        n = len(positions)
+        forces = np.zeros((n, 3))
+        energy = 0.0
+        if not self.potentials:
+            return forces, energy
+        for i, j, r, d2 in self.neighbor_list.iter_pairs(positions, self.cutoff, step):
+            pair_energy, force_over_r = self.lookup(d2)
+            f = force_over_r[:, np.newaxis] * r
+            for axis in range(3):
+                forces[:, axis] += (np.bincount(i, f[:, axis], minlength=n)
+                                    - np.bincount(j, f[:, axis], minlength=n))
+            energy += pair_energy.sum()
+        return forces, energy
+
+    def short_range_forces(self, positions, r_on, r_off, neighbors, step=None):
+        """按 switching_function 加权的近程部分受力，neighbors 为作用距离 r_off 的 VerletList
+
+        供 RESPA 内层步使用，与弹簧力的近程部分共用同一张近邻表；
+        超出最大截断距离的粒子对不查表。
+        """
+        forces = np.zeros((len(positions), 3))
+        if not self.potentials:
+            return forces
+        n = len(positions)
+        cutoff2 = self.cutoff**2
+        for i, j, r, d2 in neighbors.iter_pairs(positions, r_off, step):
+            inside = d2 < cutoff2
+            i, j, r, d2 = i[inside], j[inside], r[inside], d2[inside]
+            _, force_over_r = self.lookup(d2)
+            f = (force_over_r * switching_function(np.sqrt(d2), r_on, r_off))[:, np.newaxis] * r
+            for axis in range(3):
+                forces[:, axis] += (np.bincount(i, f[:, axis], minlength=n)
+                                    - np.bincount(j, f[:, axis], minlength=n))
+        return forces
+
+    def specs(self):
+        return [p.spec() for p in self.potentials]
+
+def parse_potential(spec):
+    """由 "名称:参数=值,..." 形式的字符串创建 TabulatedPotential"""
+    name, _, args = spec.partition(':')
+    params = {}
+    for item in filter(None, args.split(',')):
+        key, _, value = item.partition('=')
+        params[key.strip()] = float(value)
+    return TabulatedPotential(name.strip(), **params)
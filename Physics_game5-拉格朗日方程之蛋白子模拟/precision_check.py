@@ -0,0 +1,77 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""检验紧凑 float32 状态 (compact_state) 与 float64 状态的精度差异
+
+两种布局用同一个随机数种子初始化，比较初始受力和势能 V，
+以及推进固定步数后的粒子位置，任一项超出容差时返回非零退出码：
+
+    python precision_check.py --n 1000 --steps 50
+"""
+
+import argparse
+import sys
+import numpy as np
+from protein_physics import ProteinPhysics
+
+# 默认容差：受力为相对最大分量的误差，V 为相对误差，位置为绝对误差
+FORCE_TOLERANCE = 1e-5
+ENERGY_TOLERANCE = 1e-6
+POSITION_TOLERANCE = 1e-2
+
+def create_layout(compact, n, seed, integrator):
+    """按种子创建一个模拟，compact 为 True 时使用 float32 紧凑状态"""
+    simulation = ProteinPhysics()
+    simulation.num_particles = n
+    simulation.compact_state = compact
+    # 设置好布局后重新播种再初始化，两种布局的初始位置来自同样的随机数
+    np.random.seed(seed)
+    simulation.reset_simulation()
+    simulation.set_integrator(integrator)
+    return simulation
+
+def compare_layouts(n=1000, steps=50, seed=0, dt=0.01, integrator='euler'):
+    """返回 (受力相对误差, V 相对误差, steps 步后位置的最大绝对误差)"""
+    reference = create_layout(False, n, seed, integrator)
+    compact = create_layout(True, n, seed, integrator)
+
+    ref_forces = reference.calculate_forces()
+    forces = compact.calculate_forces()
+    force_error = (np.abs(forces.astype(np.float64) - ref_forces).max(initial=0.0)
+                   / max(np.abs(ref_forces).max(initial=0.0), 1e-12))
+    _, ref_V = reference.calculate_energies()
+    _, V = compact.calculate_energies()
+    energy_error = abs(V - ref_V) / max(abs(ref_V), 1e-12)
+
+    for _ in range(steps):
+        reference.update(dt)
+        compact.update(dt)
+    position_error = np.abs(compact.positions.astype(np.float64) - reference.positions).max(initial=0.0)
+    reference.close()
+    compact.close()
+    return force_error, energy_error, position_error
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比较 float32 紧凑状态与 float64 状态的精度")
+    parser.add_argument('--n', type=int, default=1000, help="粒子数量")
+    parser.add_argument('--steps', type=int, default=50, help="比较位置前推进的步数")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    parser.add_argument('--dt', type=float, default=0.01, help="时间步长")
+    parser.add_argument('--integrator', default='euler', help="积分方法")
+    parser.add_argument('--force-tolerance', type=float, default=FORCE_TOLERANCE)
+    parser.add_argument('--energy-tolerance', type=float, default=ENERGY_TOLERANCE)
+    parser.add_argument('--position-tolerance', type=float, default=POSITION_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    errors = compare_layouts(args.n, args.steps, args.seed, args.dt, args.integrator)
+    tolerances = (args.force_tolerance, args.energy_tolerance, args.position_tolerance)
+    failed = False
+    for name, error, tolerance in zip(('受力', 'V', f'{args.steps} 步后位置'), errors, tolerances):
+        ok = error <= tolerance
+        failed |= not ok
+        print(f"{name}: {error:.2e} (容差 {tolerance:.0e})  {'通过' if ok else '超出容差'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""无界面批量运行蛋白质模拟
+
+不导入 OpenGL、Tk 和 matplotlib，可在没有显示设备的计算节点上运行，例如：
+
+    python protein_headless.py --steps 100000 --n 5000 --seed 1
+
+配合 --checkpoint 定期保存检查点，中断后用相同的命令加 --resume 从检查点继续，
+--steps 为总步数，已完成的步数不会重复计算：
+
+    python protein_headless.py --steps 100000 --n 5000 --checkpoint run.npz
+    python protein_headless.py --steps 100000 --checkpoint run.npz --resume run.npz
+
+恢复时若 --trajectory 指定的文件已存在，会接着写入，检查点之后的帧被丢弃后重新记录。
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+from checkpoint import CheckpointWriter, load_checkpoint, save_checkpoint
+from force_kernels import FORCE_KERNELS
+from observables import PairDistanceHistogram
+from potentials import POTENTIALS, parse_potential
+from topology import Topology
+from integrators import INTEGRATORS
+from protein_physics import ProteinPhysics
+from trajectory import TrajectoryWriter
+
+def build_parser(description="无界面运行蛋白质模拟并统计性能"):
+    """模拟参数的命令行解析器，模拟服务器 (sim_server) 在此基础上增加自己的参数"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--headless', action='store_true',
+                        help="兼容参数，本脚本总是以无界面方式运行")
+    parser.add_argument('--steps', type=int, default=1000, help="模拟步数")
+    parser.add_argument('--n', type=int, default=100, help="粒子数量")
+    parser.add_argument('--seed', type=int, default=None, help="随机数种子")
+    parser.add_argument('--dt', type=float, default=0.01, help="时间步长")
+    parser.add_argument('--integrator', choices=sorted(INTEGRATORS), default='euler',
+                        help="积分方法")
+    parser.add_argument('--respa-steps', type=int, default=4,
+                        help="respa 积分时每个外层步 (--dt) 内近程力的积分次数")
+    parser.add_argument('--respa-split', type=float, default=0.5,
+                        help="respa 近程与远程力的分界距离，为作用距离的倍数")
+    parser.add_argument('--k', type=float, default=1.0, help="弹性系数")
+    parser.add_argument('--damping', type=float, default=0.1, help="阻尼系数")
+    parser.add_argument('--cutoff', type=float, default=5.0, help="作用距离")
+    parser.add_argument('--box', type=float, default=10.0, help="初始粒子分布的立方体边长")
+    parser.add_argument('--kernel', choices=['auto', *FORCE_KERNELS], default='auto',
+                        help="弹簧力计算核，auto 按粒子数自动选择")
+    parser.add_argument('--chain', action='store_true',
+                        help="把 --n 个粒子连成一条主链 (键长和键角项)")
+    parser.add_argument('--topology', default=None,
+                        help="成键拓扑文件 (.npz，见 topology.Topology.save)，粒子数以拓扑为准")
+    parser.add_argument('--potential', action='append', default=[],
+                        help="叠加的查表对势，可重复，例如 lennard_jones:epsilon=1,sigma=1,cutoff=2.5；"
+                             f"可选: {', '.join(POTENTIALS)}")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="并行计算受力的进程数，0 或 1 表示单进程")
+    parser.add_argument('--float32', action='store_true',
+                        help="使用紧凑的 float32 状态 (标量质量、调色板颜色)，适合大粒子数")
+    parser.add_argument('--trajectory', default=None,
+                        help="轨迹输出文件，按块写入位置和速度")
+    parser.add_argument('--trajectory-every', type=int, default=10,
+                        help="每隔多少步写入一帧轨迹")
+    parser.add_argument('--checkpoint', default=None,
+                        help="检查点文件，定期原子地保存完整的模拟状态")
+    parser.add_argument('--checkpoint-every', type=int, default=1000,
+                        help="每隔多少步保存一次检查点")
+    parser.add_argument('--resume', default=None,
+                        help="从检查点文件恢复模拟 (粒子数和模拟参数以检查点为准)")
+    parser.add_argument('--rdf', default=None,
+                        help="粒子对距离直方图和 g(r) 的输出文件 (.npz)，在运行中累积")
+    parser.add_argument('--rdf-every', type=int, default=10, help="每隔多少步累积一次距离直方图")
+    parser.add_argument('--rdf-bins', type=int, default=100, help="距离直方图的区间数")
+    parser.add_argument('--report-every', type=int, default=0,
+                        help="每隔多少步打印一次进度，0 表示不打印")
+    return parser
+
+def parse_args(argv=None):
+    return build_parser().parse_args(argv)
+
+def create_simulation(args):
+    """按命令行参数创建并初始化模拟，指定 --resume 时从检查点恢复"""
+    if args.resume:
+        simulation = ProteinPhysics()
+        load_checkpoint(simulation, args.resume)
+        simulation.num_workers = args.workers
+        return simulation
+    if args.seed is not None:
+        np.random.seed(args.seed)
+    simulation = ProteinPhysics()
+    simulation.num_particles = args.n
+    simulation.interaction_distance = args.cutoff
+    simulation.box_size = args.box
+    simulation.compact_state = args.float32
+    if args.topology:
+        simulation.topology = Topology.load(args.topology)
+    elif args.chain:
+        simulation.topology = Topology.chain(args.n)
+    simulation.reset_simulation()
+    simulation.k = args.k
+    simulation.damping = args.damping
+    simulation.set_integrator(args.integrator)
+    simulation.respa_steps = args.respa_steps
+    simulation.respa_split = args.respa_split
+    simulation.set_force_kernel(args.kernel)
+    for spec in args.potential:
+        simulation.potentials.add(parse_potential(spec))
+    simulation.num_workers = args.workers
+    return simulation
+
+def print_energies(simulation):
+    T, V = simulation.calculate_energies()
+    print(f"动能 T: {T:.6f}")
+    print(f"势能 V: {V:.6f}")
+    print(f"拉格朗日量 L: {T - V:.6f}")
+    print(f"能量漂移: {simulation.energy_drift():.3e}")
+
+def run(args):
+    simulation = create_simulation(args)
+    print(f"粒子数: {simulation.num_particles}  步数: {args.steps}  "
+          f"dt: {args.dt}  积分方法: {simulation.integrator}  计算核: {simulation.active_kernel()}")
+    first_step = simulation.step_count
+    if args.resume:
+        print(f"从检查点 {args.resume} 恢复，已完成 {first_step} 步")
+
+    writer = None
+    if args.trajectory:
+        # 从检查点恢复时接着已有的轨迹写入，丢弃检查点之后的帧
+        resume_step = simulation.step_count if args.resume and os.path.exists(args.trajectory) else None
+        writer = TrajectoryWriter(args.trajectory, simulation.num_particles,
+                                  every=args.trajectory_every, resume_step=resume_step)
+        if resume_step is not None:
+            print(f"续写轨迹 {args.trajectory}，保留 {writer.num_frames} 帧")
+        writer.record(simulation)
+    checkpointer = None
+    if args.checkpoint:
+        checkpointer = CheckpointWriter(args.checkpoint, every=args.checkpoint_every)
+    histogram = None
+    if args.rdf:
+        histogram = PairDistanceHistogram(simulation.interaction_distance, args.rdf_bins,
+                                          every=args.rdf_every)
+
+    start = time.perf_counter()
+    try:
+        while simulation.step_count < args.steps:
+            simulation.update(args.dt)
+            step = simulation.step_count
+            if writer is not None:
+                writer.record(simulation)
+            if checkpointer is not None and checkpointer.record(simulation) and writer is not None:
+                # 检查点之前的帧都写入文件头，中断后恢复时不会丢失
+                writer.flush()
+            if histogram is not None:
+                histogram.record(simulation)
+            if args.report_every and step % args.report_every == 0:
+                elapsed = time.perf_counter() - start
+                T, V = simulation.calculate_energies()
+                print(f"步 {step}: {(step - first_step) / elapsed:.1f} 步/秒  T={T:.4f}  V={V:.4f}")
+        elapsed = time.perf_counter() - start
+        if checkpointer is not None:
+            # 结束时总是保存一次，下次可从最终状态继续
+            save_checkpoint(simulation, args.checkpoint)
+        steps_run = simulation.step_count - first_step
+
+        print(f"用时: {elapsed:.3f} 秒  速度: {steps_run / max(elapsed, 1e-12):.1f} 步/秒")
+        print_energies(simulation)
+        print(f"近邻表: {simulation.neighbor_stats()}")
+        if histogram is not None:
+            histogram.save(args.rdf)
+            print(f"距离直方图: {args.rdf} ({histogram.num_samples} 次采样)")
+    finally:
+        if writer is not None:
+            writer.close()
+            print(f"轨迹: {args.trajectory} ({writer.num_frames} 帧)")
+        # 结束多进程后端，释放共享内存
+        simulation.close()
+    return simulation
+
+def main(argv=None):
+    run(parse_args(argv))
+
+if __name__ == "__main__":
+    main()
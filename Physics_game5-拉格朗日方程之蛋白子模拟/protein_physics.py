@@ -0,0 +1,324 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import numpy as np
+from neighbor_search import VerletList
+from integrators import INTEGRATORS
+from force_kernels import FORCE_KERNELS, choose_kernel, concatenate_pairs, short_range_forces
+from parallel_forces import ParallelForceBackend
+from potentials import PotentialSet
+
+# Verlet 近邻表的缓冲层厚度，粒子最大位移超过其一半时重建近邻表
+NEIGHBOR_SKIN = 0.5
+# RESPA 近程力切换区间的宽度，近程力在 [分界距离 - 宽度, 分界距离] 内平滑降为 0
+RESPA_SWITCH_WIDTH = 0.5
+
+# 每个粒子一行的状态数组，增减粒子时一起扩展或截断
+PARTICLE_ARRAYS = ('positions', 'velocities', 'masses', 'colors')
+
+# 紧凑模式下粒子颜色按编号从固定调色板循环取用，不为每个粒子单独存储
+COLOR_PALETTE = np.random.RandomState(0).rand(64, 3).astype(np.float32)
+
+class ProteinPhysics:
+    """蛋白质粒子模拟的物理部分，不依赖 OpenGL、Tk 和 matplotlib，可在无显示环境下运行"""
+    def __init__(self):
+        # 初始化参数
+        self.num_particles = 100
+        self.interaction_distance = 5.0  # 新增参数：作用距离
+        self.box_size = 10.0  # 初始粒子随机分布的立方体边长
+        self.use_neighbor_list = True  # 使用缓存的 Verlet 近邻表，代价与粒子对数成线性关系
+        self.force_kernel = 'auto'  # 弹簧力计算核，可选值见 force_kernels.FORCE_KERNELS，auto 按粒子数选择
+        self.neighbor_list = VerletList(self.interaction_distance, skin=NEIGHBOR_SKIN)
+        self.integrator = 'euler'  # 积分方法，可选值见 integrators.INTEGRATORS
+        self.num_workers = 0  # 大于 1 时用多进程并行计算受力
+        # 多时间步积分 (integrator = 'respa')：每个外层步内近程力积分 respa_steps 次，
+        # 近程与远程的分界距离为 respa_split * interaction_distance
+        self.respa_steps = 4
+        self.respa_split = 0.5
+        self.short_neighbor_list = VerletList(self.respa_split * self.interaction_distance,
+                                              skin=NEIGHBOR_SKIN)
+        self._parallel_backend = None
+        # 紧凑状态：float32 的位置和速度、标量质量、按调色板生成颜色，
+        # 用于 10^5 以上粒子数时减少内存带宽，在 reset_simulation 时生效
+        self.compact_state = False
+        # 成键拓扑 (topology.Topology)，为 None 时只有非键的截断弹簧力
+        self.topology = None
+        # 查表计算的非键对势 (potentials.PotentialSet)，与弹簧力叠加
+        self.potentials = PotentialSet()
+        self.reset_simulation()
+        self.reset_camera()
+    
+    def reset_simulation(self):
+        # 重置粒子状态
+        dtype = np.float32 if self.compact_state else np.float64
+        if self.topology is not None:
+            # 有成键拓扑时粒子数由拓扑决定，初始构象为沿主链的随机游走
+            self.num_particles = self.topology.num_particles
+            positions = self.topology.initial_positions(self.box_size)
+        else:
+            positions = np.random.rand(self.num_particles, 3) * self.box_size
+        self.positions = positions.astype(dtype, copy=False)
+        self.velocities = np.zeros((self.num_particles, 3), dtype=dtype)
+        self.k = 1.0
+        self.damping = 0.1
+        if self.compact_state:
+            # 所有粒子质量相同，只存一个标量；颜色在绘制时按编号生成
+            self.masses = dtype(1.0)
+            self.colors = None
+        else:
+            self.masses = np.ones(self.num_particles)
+            self.colors = np.random.rand(self.num_particles, 3)
+        self.step_count = 0
+        # 增减粒子用的后备数组，第一次调用 set_num_particles 时由当前数组建立
+        self._particle_store = {}
+        self.reset_energy_reference()
+        self.invalidate_cache()
+    
+    def new_particle_values(self, name, count):
+        """新加入粒子的初始状态：立方体内的随机位置、零速度、单位质量、随机颜色"""
+        if name == 'positions':
+            return np.random.rand(count, 3) * self.box_size
+        if name == 'velocities':
+            return np.zeros((count, 3))
+        if name == 'masses':
+            return np.ones(count)
+        return np.random.rand(count, 3)
+    
+    def set_num_particles(self, num_particles):
+        """增减粒子而不重置其余粒子的状态
+
+        状态数组是容量按两倍增长的后备数组的前 num_particles 行 (视图)，
+        增加粒子时在末尾追加，减少时截掉末尾的粒子，容量足够时不重新分配内存。
+        """
+        if self.topology is not None:
+            raise ValueError("有成键拓扑时粒子数由拓扑决定")
+        old = self.num_particles
+        if num_particles == old:
+            return
+        for name in PARTICLE_ARRAYS:
+            current = getattr(self, name)
+            if current is None or np.ndim(current) == 0:
+                continue  # 紧凑状态下的标量质量和按编号生成的颜色
+            store = self._particle_store.get(name)
+            if store is None or not np.may_share_memory(current, store):
+                # 数组被整体替换过 (重置或从检查点恢复)，以当前数组重新建立后备数组
+                store = current
+            if num_particles > len(store):
+                grown = np.empty((max(num_particles, 2 * len(store)),) + store.shape[1:], dtype=store.dtype)
+                grown[:old] = current
+                store = grown
+            if num_particles > old:
+                store[old:num_particles] = self.new_particle_values(name, num_particles - old)
+            self._particle_store[name] = store
+            setattr(self, name, store[:num_particles])
+        self.num_particles = num_particles
+        self.reset_energy_reference()
+        self.invalidate_cache()
+    
+    def reset_camera(self):
+        # 重置相机参数到初始状态
+        self.rotate_x = 0
+        self.rotate_y = 0
+        self.translate_x = 0
+        self.translate_y = 0
+        self.zoom = -30.0
+        
+        # 重置鼠标参数
+        self.mouse_x = 0
+        self.mouse_y = 0
+        self.mouse_button = None
+
+    def neighbor_stats(self):
+        """近邻表重建次数和重建间隔，用于调节 skin"""
+        return self.neighbor_list.stats()
+
+    def invalidate_cache(self):
+        """粒子位置改变后调用，使下一次读取重新计算力和能量"""
+        self._evaluated_key = None
+        self._fast_forces = None
+        self._fast_forces_key = None
+
+    def evaluation_key(self):
+        """决定受力缓存是否有效的参数，任一项改变 (或位置改变) 都要重新计算"""
+        return (self.k, self.interaction_distance, self.force_kernel, self.use_neighbor_list,
+                self.num_workers, self.potentials.version)
+
+    def evaluate(self):
+        """用当前计算核对当前位置做一次融合遍历，缓存弹簧力、势能 V、U 和作用距离内的粒子对
+
+        位置不变时再次调用 (控制面板、绘制、下一步积分) 直接读取缓存，不再重复计算粒子对距离。
+        """
+        key = self.evaluation_key()
+        if key == self._evaluated_key:
+            return
+        
+        if self.num_workers > 1:
+            # 多进程按空间区域并行计算，不收集粒子对 (并行模式下不绘制连线)
+            forces, V, U = self.parallel_backend().compute(
+                self.positions, self.k, self.interaction_distance)
+            bond_pairs = concatenate_pairs([], [])
+        else:
+            # 近邻表只在粒子位移超过 skin / 2 或作用距离改变时重建
+            neighbors = self.neighbor_list if self.use_neighbor_list else None
+            kernel = FORCE_KERNELS[self.active_kernel()]
+            forces, V, U, bond_pairs = kernel(self.positions, self.k, self.interaction_distance,
+                                              neighbors, self.step_count)
+        self.nonbonded_forces = forces
+        
+        # 成键项与非键力分开计算，再合并为总的保守力；成键势能同时计入 V 和 U
+        if self.topology is not None:
+            self.bonded_forces, self.bonded_energy = self.topology.terms(self.positions)
+            forces = forces + self.bonded_forces.astype(forces.dtype, copy=False)
+            V += self.bonded_energy
+            U += self.bonded_energy
+        else:
+            self.bonded_forces = None
+            self.bonded_energy = 0.0
+        
+        # 查表对势同样计入保守力和势能
+        self.tabulated_energy = 0.0
+        if len(self.potentials):
+            tabulated_forces, self.tabulated_energy = self.potentials.terms(self.positions, self.step_count)
+            forces = forces + tabulated_forces.astype(forces.dtype, copy=False)
+            V += self.tabulated_energy
+            U += self.tabulated_energy
+        
+        self.spring_forces = forces
+        self.potential_energy = V
+        self.force_potential_energy = U
+        self.bond_pairs = bond_pairs
+        self._evaluated_key = key
+
+    def set_topology(self, topology):
+        """设置成键拓扑 (None 表示去掉成键项) 并重新初始化模拟"""
+        self.topology = topology
+        self.reset_simulation()
+    
+    def active_kernel(self):
+        """当前实际使用的计算核名称"""
+        if self.force_kernel == 'auto':
+            return choose_kernel(self.num_particles, self.use_neighbor_list,
+                                 self.positions, self.interaction_distance)
+        return self.force_kernel
+    
+    def set_force_kernel(self, name):
+        """切换弹簧力计算核，name 为 FORCE_KERNELS 中的名称或 'auto'"""
+        if name != 'auto' and name not in FORCE_KERNELS:
+            raise ValueError(f"未知的计算核: {name}")
+        self.force_kernel = name
+    
+    def parallel_backend(self):
+        """按 num_workers 创建 (或重建) 多进程受力计算后端"""
+        backend = self._parallel_backend
+        if backend is None or backend.num_workers != self.num_workers:
+            if backend is not None:
+                backend.close()
+            self._parallel_backend = ParallelForceBackend(self.num_workers)
+        return self._parallel_backend
+
+    def close(self):
+        """释放多进程后端占用的进程和共享内存"""
+        if self._parallel_backend is not None:
+            self._parallel_backend.close()
+            self._parallel_backend = None
+
+    def mass_column(self):
+        """可与 (N, 3) 数组直接广播的质量；紧凑模式下为标量"""
+        if np.ndim(self.masses) == 0:
+            return self.masses
+        return self.masses[:, np.newaxis]
+
+    def damping_column(self):
+        """可与 (N, 3) 数组直接广播的阻尼系数"""
+        return self.damping
+
+    def calculate_damping_power(self):
+        """阻尼力的耗散功率 damping * sum(v^2)"""
+        return self.damping * np.sum(self.velocities**2, dtype=np.float64)
+
+    def particle_colors(self):
+        """每个粒子的绘制颜色，紧凑模式下按编号从调色板中取用"""
+        if self.colors is not None:
+            return self.colors
+        return COLOR_PALETTE[np.arange(self.num_particles) % len(COLOR_PALETTE)]
+
+    def calculate_kinetic_energy(self):
+        return 0.5 * np.sum(self.mass_column() * self.velocities**2, dtype=np.float64)
+
+    def calculate_energies(self):
+        """计算系统的动能和势能"""
+        self.evaluate()
+        return self.calculate_kinetic_energy(), self.potential_energy
+
+    def calculate_lagrangian(self):
+        T, V = self.calculate_energies()
+        return T - V
+
+    def calculate_spring_forces(self):
+        """不含阻尼的保守弹簧力"""
+        self.evaluate()
+        return self.spring_forces
+
+    def calculate_fast_forces(self):
+        """RESPA 的近程部分：分界距离内按切换函数加权的弹簧力和查表对势，加上刚性的成键力
+
+        与 evaluate 一样按参数缓存：滑块修改 k、作用距离或分界比例后立即重新计算，
+        否则外层步 (完整受力 - 近程部分) 会减去按旧参数算出的近程力。
+        """
+        key = self.evaluation_key() + (self.respa_split,)
+        if key != self._fast_forces_key:
+            r_off = self.respa_split * self.interaction_distance
+            r_on = max(r_off - RESPA_SWITCH_WIDTH, 0.0)
+            forces = short_range_forces(self.positions, self.k, r_on, r_off,
+                                        self.short_neighbor_list, self.step_count)
+            if len(self.potentials):
+                # 查表对势的排斥核很硬，同样按切换函数把近程部分放到内层步积分
+                tabulated_forces = self.potentials.short_range_forces(
+                    self.positions, r_on, r_off, self.short_neighbor_list, self.step_count)
+                forces += tabulated_forces.astype(forces.dtype, copy=False)
+            if self.topology is not None:
+                bonded_forces, _ = self.topology.terms(self.positions)
+                forces += bonded_forces.astype(forces.dtype, copy=False)
+            self._fast_forces = forces
+            self._fast_forces_key = key
+        return self._fast_forces
+    
+    def calculate_slow_forces(self):
+        """RESPA 的远程部分：完整的保守力减去近程部分，只在外层步计算"""
+        return self.calculate_spring_forces() - self.calculate_fast_forces()
+    
+    def calculate_forces(self):
+        # 添加阻尼力
+        return self.calculate_spring_forces() - self.damping * self.velocities
+
+    def calculate_total_energy(self):
+        """与受力一致的总能量 T + U，用于检验积分器的能量守恒"""
+        self.evaluate()
+        return self.calculate_kinetic_energy() + self.force_potential_energy
+
+    def reset_energy_reference(self):
+        """从下一步开始重新统计能量漂移"""
+        self.reference_energy = None
+        self.dissipated_energy = 0.0
+
+    def energy_drift(self):
+        """相对能量漂移 (T + U + 阻尼耗散的能量 - E0) / |E0|"""
+        if self.reference_energy is None:
+            return 0.0
+        E = self.calculate_total_energy() + self.dissipated_energy
+        return (E - self.reference_energy) / max(abs(self.reference_energy), 1e-12)
+
+    def set_integrator(self, name):
+        """切换积分方法，并重新统计能量漂移"""
+        if name not in INTEGRATORS:
+            raise ValueError(f"未知的积分方法: {name}")
+        self.integrator = name
+        self.reset_energy_reference()
+
+    def update(self, dt=0.01):
+        # 按选择的积分方法更新位置和速度
+        if self.reference_energy is None:
+            self.reference_energy = self.calculate_total_energy()
+        self.dissipated_energy += INTEGRATORS[self.integrator](self, dt)
+        self.step_count += 1
@@ -2,20 +2,73 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import argparse
+import atexit
+import os
+import subprocess
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
 import sys
+import time
 import tkinter as tk
 from tkinter import ttk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
+from integrators import INTEGRATOR_NAMES
+from protein_physics import ProteinPhysics
+from gl_renderer import create_renderer
+from fixed_timestep import FixedTimestepScheduler
+from frame_profiler import FrameProfiler
+from sim_server import DEFAULT_PORT, RemoteSimulation, parse_address
+
+# 物理步长和每个绘制帧的物理子步数，目标步速为 FRAME_RATE * PHYSICS_SUBSTEPS 步/秒
+PHYSICS_DT = 0.01
+PHYSICS_SUBSTEPS = 2
+FRAME_RATE = 60.0
+
+# 控制面板的刷新频率 (Hz) 和能量曲线保留的采样点数
+PANEL_REFRESH_RATE = 8.0
+ENERGY_HISTORY_LENGTH = 240
+
+# 每帧各阶段的计时：p 键开关计时和屏幕叠加显示，o 键导出统计，c 键用 cProfile 记录若干帧
+profiler = FrameProfiler()
+FRAME_TIMINGS_FILE = 'frame_timings.json'
+PROFILE_FILE = 'protein_frames.prof'
+# 拖动粒子数量滑块时，停止拖动这么多毫秒后才增减粒子
+PARTICLE_DEBOUNCE_MS = 200
+# 观察者模式下等待服务器启动的最长时间 (秒)
+SERVER_START_TIMEOUT = 10.0
+
+class RingBuffer:
+    """固定容量的环形缓冲区，写满后覆盖最旧的记录"""
+    def __init__(self, capacity, width):
+        self.data = np.zeros((capacity, width))
+        self.capacity = capacity
+        self.index = 0
+        self.count = 0
+    
+    def append(self, row):
+        self.data[self.index] = row
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+    
+    def values(self):
+        """按时间顺序返回所有记录"""
+        if self.count < self.capacity:
+            return self.data[:self.count]
+        return np.concatenate((self.data[self.index:], self.data[:self.index]))
 
 class ControlPanel:
-    def __init__(self, simulation):
+    def __init__(self, simulation, scheduler=None, refresh_rate=PANEL_REFRESH_RATE):
         self.simulation = simulation
+        self.scheduler = scheduler
+        self.refresh_rate = refresh_rate
+        self.last_refresh = 0.0
+        self.energy_history = RingBuffer(ENERGY_HISTORY_LENGTH, 2)
+        self.pending_num_particles = None
         self.root = tk.Tk()
         self.root.title("参数控制面板")
         
@@ -41,7 +94,7 @@ class ControlPanel:
     
     def create_widgets(self):
         # 设置网格布局权重
-        for i in range(7):  # 为所有行设置权重
+        for i in range(8):  # 为所有行设置权重
             self.root.grid_rowconfigure(i, weight=1)
         
         # 弹性系数控制
@@ -67,25 +120,34 @@ class ControlPanel:
         
         # 粒子数量控制
         tk.Label(self.root, text="粒子数量:").grid(row=3, column=0, padx=5, pady=5, sticky="ew")
-        num_scale = ttk.Scale(self.root, from_=10, to=100, orient=tk.HORIZONTAL,
+        num_scale = ttk.Scale(self.root, from_=10, to=1000, orient=tk.HORIZONTAL,
                              command=self.update_num_particles)
         num_scale.set(self.simulation.num_particles)
         num_scale.grid(row=3, column=1, padx=5, pady=5, sticky="ew")
         
+        # 积分方法选择
+        tk.Label(self.root, text="积分方法:").grid(row=4, column=0, padx=5, pady=5, sticky="ew")
+        integrator_names = list(INTEGRATOR_NAMES.values())
+        integrator_box = ttk.Combobox(self.root, values=integrator_names, state="readonly")
+        integrator_box.set(INTEGRATOR_NAMES[self.simulation.integrator])
+        integrator_box.bind("<<ComboboxSelected>>",
+                            lambda e: self.update_integrator(integrator_box.current()))
+        integrator_box.grid(row=4, column=1, padx=5, pady=5, sticky="ew")
+        
         # 重置按钮
         reset_btn = ttk.Button(self.root, text="重置模拟",
                               command=self.simulation.reset_simulation)
-        reset_btn.grid(row=4, column=0, padx=5, pady=5, sticky="ew")
+        reset_btn.grid(row=5, column=0, padx=5, pady=5, sticky="ew")
         
         # 重置相机按钮
         reset_camera_btn = ttk.Button(self.root, text="重置视角",
                                      command=self.simulation.reset_camera)
-        reset_camera_btn.grid(row=4, column=1, padx=5, pady=5, sticky="ew")
+        reset_camera_btn.grid(row=5, column=1, padx=5, pady=5, sticky="ew")
     
     def create_energy_display(self):
         # 创建能量显示框架
         energy_frame = ttk.LabelFrame(self.root, text="能量信息")
-        energy_frame.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        energy_frame.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
         
         # 创建标签显示各种能量
         self.kinetic_label = tk.Label(energy_frame, text="动能: 0.000")
@@ -96,167 +158,178 @@ class ControlPanel:
         
         self.lagrangian_label = tk.Label(energy_frame, text="拉格朗日量: 0.000")
         self.lagrangian_label.grid(row=2, column=0, padx=5, pady=2, sticky="w")
+        
+        self.drift_label = tk.Label(energy_frame, text="能量漂移: 0.000%")
+        self.drift_label.grid(row=3, column=0, padx=5, pady=2, sticky="w")
+        
+        self.rate_label = tk.Label(energy_frame, text="物理步速: 0 / 0 步/秒")
+        self.rate_label.grid(row=4, column=0, padx=5, pady=2, sticky="w")
     
     def create_energy_plot(self):
         plot_frame = ttk.LabelFrame(self.root, text="能量分布")
-        plot_frame.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
+        plot_frame.grid(row=7, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
         
         # 设置matplotlib中文字体
         plt.rcParams['font.sans-serif'] = ['SimHei', '微软雅黑', 'Arial Unicode MS']
         plt.rcParams['axes.unicode_minus'] = False
         
         self.fig = Figure(figsize=(6, 3), dpi=100)
-        self.ax = self.fig.add_subplot(111)
+        self.ax, self.history_ax = self.fig.subplots(1, 2, gridspec_kw={'width_ratios': [1, 2]})
         
-        # 初始化柱状图数据
-        self.bars = self.ax.bar(['动能', '势能'], [0, 0], color=['skyblue', 'lightcoral'])
+        # 初始化柱状图数据；动态元素设为 animated，只在缓存的背景上重绘它们
+        self.bars = self.ax.bar(['动能', '势能'], [0, 0], color=['skyblue', 'lightcoral'],
+                                animated=True)
         self.ax.set_ylim(0, 10)
         
+        # 最近一段时间的能量曲线，数据来自环形缓冲区
+        history_seconds = ENERGY_HISTORY_LENGTH / self.refresh_rate
+        self.kinetic_line, = self.history_ax.plot([], [], color='skyblue', animated=True)
+        self.potential_line, = self.history_ax.plot([], [], color='lightcoral', animated=True)
+        self.history_ax.set_xlim(-history_seconds, 0)
+        self.history_ax.set_ylim(0, 10)
+        
         # 配置字体
         font_props = {'family': 'SimHei'}
         self.ax.set_title('能量分布图', fontdict=font_props)
         self.ax.set_xlabel('能量类型', fontdict=font_props)
         self.ax.set_ylabel('能量值', fontdict=font_props)
+        self.history_ax.set_title('能量变化', fontdict=font_props)
+        self.history_ax.set_xlabel('时间 (秒)', fontdict=font_props)
         
-        for label in self.ax.get_xticklabels() + self.ax.get_yticklabels():
-            label.set_fontproperties('SimHei')
+        for ax in (self.ax, self.history_ax):
+            for label in ax.get_xticklabels() + ax.get_yticklabels():
+                label.set_fontproperties('SimHei')
         
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_frame)
-        self.canvas.draw()
+        self.background = None
+        # 每次完整重绘 (包括窗口缩放) 后重新缓存不含动态元素的背景
+        self.canvas.mpl_connect('draw_event', self.cache_background)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
         
         # 设置网格布局权重
-        self.root.grid_rowconfigure(6, weight=1)
+        self.root.grid_rowconfigure(7, weight=1)
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_columnconfigure(1, weight=1)
         
         self.fig.tight_layout()
+        self.canvas.draw()
+    
+    def cache_background(self, event=None):
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
+    
+    def draw_animated(self):
+        """在缓存的背景上只重绘柱状图和能量曲线"""
+        if self.background is None:
+            return
+        self.canvas.restore_region(self.background)
+        for bar in self.bars:
+            self.ax.draw_artist(bar)
+        self.history_ax.draw_artist(self.kinetic_line)
+        self.history_ax.draw_artist(self.potential_line)
+        self.canvas.blit(self.fig.bbox)
     
     def update_num_particles(self, value):
-        """专门处理粒子数量更新的函数"""
-        new_num = int(float(value))
-        if new_num != self.simulation.num_particles:
-            self.simulation.num_particles = new_num
-            self.simulation.reset_simulation()  # 重新初始化模拟
+        """专门处理粒子数量更新的函数，拖动过程中只记录最新的值"""
+        if self.pending_num_particles is not None:
+            self.root.after_cancel(self.pending_num_particles)
+        self.pending_num_particles = self.root.after(
+            PARTICLE_DEBOUNCE_MS, self.apply_num_particles, int(float(value)))
+    
+    def apply_num_particles(self, new_num):
+        """增减粒子，保留已有粒子的状态"""
+        self.pending_num_particles = None
+        if self.simulation.topology is None:
+            self.simulation.set_num_particles(new_num)
     
     def update_param(self, param_name, value):
         """更新其他参数"""
         if param_name != 'num_particles':  # 粒子数量由专门的函数处理
             setattr(self.simulation, param_name, value)
     
+    def update_integrator(self, index):
+        """切换积分方法"""
+        self.simulation.set_integrator(list(INTEGRATOR_NAMES)[index])
+    
+    def rescale_axis(self, ax, max_energy):
+        """动态调整y轴范围，返回是否改变 (改变后需要完整重绘背景)"""
+        current_ymax = ax.get_ylim()[1]
+        if max_energy > current_ymax:
+            ax.set_ylim(0, max_energy * 1.2)
+        elif max_energy < current_ymax * 0.5:
+            ax.set_ylim(0, current_ymax * 0.8)
+        else:
+            return False
+        return True
+    
     def update_energy_plot(self, T, V):
         # 更新柱状图数据
         self.bars[0].set_height(T)
         self.bars[1].set_height(V)
         
-        # 动态调整y轴范围
-        max_energy = max(T, V)
-        current_ymax = self.ax.get_ylim()[1]
-        if max_energy > current_ymax:
-            self.ax.set_ylim(0, max_energy * 1.2)
-        elif max_energy < current_ymax * 0.5:
-            self.ax.set_ylim(0, current_ymax * 0.8)
+        # 更新能量曲线，横轴为距当前的时间
+        history = self.energy_history.values()
+        times = (np.arange(len(history)) - len(history) + 1) / self.refresh_rate
+        self.kinetic_line.set_data(times, history[:, 0])
+        self.potential_line.set_data(times, history[:, 1])
+        
+        rescaled = self.rescale_axis(self.ax, max(T, V))
+        rescaled |= self.rescale_axis(self.history_ax, history.max())
+        if rescaled:
+            # 坐标轴变化时完整重绘一次，draw_event 会重新缓存背景
+            self.canvas.draw()
+        else:
+            self.draw_animated()
+    
+    def refresh(self):
+        """刷新能量标签和图表，窗口已关闭时返回 False"""
+        with profiler.span('panel.energy'):
+            T, V = self.simulation.calculate_energies()
+        L = T - V
+        self.energy_history.append((T, V))
         
-        # 重绘图表
-        self.canvas.draw()
+        # 更新文本标签
+        try:
+            self.kinetic_label.config(text=f"动能: {T:.3f}")
+            self.potential_label.config(text=f"势能: {V:.3f}")
+            self.lagrangian_label.config(text=f"拉格朗日量: {L:.3f}")
+            self.drift_label.config(text=f"能量漂移: {self.simulation.energy_drift():.3%}")
+            if self.scheduler is not None:
+                stats = self.scheduler.stats()
+                rate = f"{stats['achieved_steps_per_second']:.0f}"
+                if stats['target_steps_per_second'] > 0:  # 目标为 0 表示服务器全速运行
+                    rate += f" / {stats['target_steps_per_second']:.0f}"
+                self.rate_label.config(text=f"物理步速: {rate} 步/秒")
+            
+            # 更新能量图
+            with profiler.span('panel.plot'):
+                self.update_energy_plot(T, V)
+        except tk.TclError:
+            return False
+        return True
     
     def update(self):
         try:
             if not self.root.winfo_exists():
                 return
-                
-            T, V = self.simulation.calculate_energies()
-            L = T - V
             
-            # 更新文本标签
-            try:
-                self.kinetic_label.config(text=f"动能: {T:.3f}")
-                self.potential_label.config(text=f"势能: {V:.3f}")
-                self.lagrangian_label.config(text=f"拉格朗日量: {L:.3f}")
-                
-                # 更新能量柱状图
-                self.update_energy_plot(T, V)
-            except tk.TclError:
-                return
-                
-            self.root.update()
+            # 标签和图表按 refresh_rate 限频刷新，Tk 事件仍然每次处理
+            now = time.perf_counter()
+            if now - self.last_refresh >= 1.0 / self.refresh_rate:
+                self.last_refresh = now
+                if not self.refresh():
+                    return
+            
+            with profiler.span('tk'):
+                self.root.update()
         except:
             pass  # 忽略所有其他错误
 
-class ProteinSimulation:
-    def __init__(self):
-        # 初始化参数
-        self.num_particles = 100
-        self.interaction_distance = 5.0  # 新增参数：作用距离
-        self.reset_simulation()
-        self.reset_camera()
-    
-    def reset_simulation(self):
-        # 重置粒子状态
-        self.positions = np.random.rand(self.num_particles, 3) * 10
-        self.velocities = np.zeros((self.num_particles, 3))
-        self.masses = np.ones(self.num_particles)
-        self.k = 1.0
-        self.damping = 0.1
-        self.colors = np.random.rand(self.num_particles, 3)
+class SceneView:
+    """粒子和连线的 OpenGL 绘制，需要 positions、particle_colors()、bond_pairs、evaluate() 和相机参数"""
+    # 实例化渲染器，在 OpenGL 上下文创建后由 main 设置；为 None 时使用逐粒子的立即模式绘制
+    renderer = None
     
-    def reset_camera(self):
-        # 重置相机参数到初始状态
-        self.rotate_x = 0
-        self.rotate_y = 0
-        self.translate_x = 0
-        self.translate_y = 0
-        self.zoom = -30.0
-        
-        # 重置鼠标参数
-        self.mouse_x = 0
-        self.mouse_y = 0
-        self.mouse_button = None
-
-    def calculate_energies(self):
-        """计算系统的动能和势能"""
-        # 计算动能 T
-        T = 0.5 * np.sum(self.masses[:, np.newaxis] * self.velocities**2)
-        
-        # 计算势能 V
-        V = 0
-        for i in range(self.num_particles):
-            for j in range(i + 1, self.num_particles):
-                r = self.positions[i] - self.positions[j]
-                distance = np.linalg.norm(r)
-                if distance < self.interaction_distance:
-                    V += 0.5 * self.k * distance**2
-        
-        return T, V
-
-    def calculate_lagrangian(self):
-        T, V = self.calculate_energies()
-        return T - V
-
-    def calculate_forces(self):
-        forces = np.zeros_like(self.positions)
-        
-        for i in range(self.num_particles):
-            dV_dq = np.zeros(3)
-            for j in range(self.num_particles):
-                if i != j:
-                    r = self.positions[i] - self.positions[j]
-                    distance = np.linalg.norm(r)
-                    if distance < self.interaction_distance:
-                        dV_dq += self.k * r / distance
-            
-            forces[i] = -dV_dq
-        
-        # 添加阻尼力
-        forces -= self.damping * self.velocities
-        return forces
-
-    def update(self, dt=0.01):
-        # 更新位置和速度
-        forces = self.calculate_forces()
-        self.velocities += forces * dt / self.masses[:, np.newaxis]
-        self.positions += self.velocities * dt
-
     def draw(self):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glLoadIdentity()
@@ -266,24 +339,88 @@ class ProteinSimulation:
         glRotatef(self.rotate_x, 1.0, 0.0, 0.0)
         glRotatef(self.rotate_y, 0.0, 1.0, 0.0)
         
+        # 连线复用本步缓存的作用距离内粒子对
+        self.evaluate()
+        if self.renderer is not None:
+            self.renderer.draw(self.positions, self.particle_colors(), self.bond_pairs)
+        else:
+            self.draw_immediate()
+        
+        if profiler.show_overlay:
+            self.draw_overlay(profiler.overlay_lines())
+        
+        glutSwapBuffers()
+    
+    def draw_overlay(self, lines):
+        """在窗口左上角用位图字体显示文本"""
+        glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glColor3f(1.0, 1.0, 0.0)
+        height = glutGet(GLUT_WINDOW_HEIGHT)
+        for row, line in enumerate(lines):
+            glWindowPos2i(10, height - 20 - 15 * row)
+            for char in line:
+                glutBitmapCharacter(GLUT_BITMAP_9_BY_15, ord(char))
+        glPopAttrib()
+    
+    def draw_immediate(self):
+        """立即模式绘制，用于不支持实例化绘制的 OpenGL 环境"""
         # 绘制粒子
-        for i, (pos, color) in enumerate(zip(self.positions, self.colors)):
+        for pos, color in zip(self.positions, self.particle_colors()):
             glPushMatrix()
             glTranslatef(pos[0], pos[1], pos[2])
             glColor3f(color[0], color[1], color[2])
             glutSolidSphere(0.3, 10, 10)
             glPopMatrix()
-            
-            # 绘制粒子之间的连接线
-            for j in range(i + 1, self.num_particles):
-                if np.linalg.norm(self.positions[i] - self.positions[j]) < 5.0:
-                    glBegin(GL_LINES)
-                    glColor3f(0.5, 0.5, 0.5)
-                    glVertex3f(pos[0], pos[1], pos[2])
-                    glVertex3f(self.positions[j][0], self.positions[j][1], self.positions[j][2])
-                    glEnd()
         
-        glutSwapBuffers()
+        # 绘制粒子之间的连接线
+        glBegin(GL_LINES)
+        glColor3f(0.5, 0.5, 0.5)
+        i, j = self.bond_pairs
+        for a, b in zip(self.positions[i], self.positions[j]):
+            glVertex3f(a[0], a[1], a[2])
+            glVertex3f(b[0], b[1], b[2])
+        glEnd()
+
+class ProteinSimulation(SceneView, ProteinPhysics):
+    """带 OpenGL 绘制的蛋白质模拟，物理部分见 protein_physics.ProteinPhysics"""
+    def evaluate(self):
+        # 位置更新或参数改变后的受力计算单独计时 (包含在 physics 阶段之内)，读取缓存的调用不计入
+        if self.evaluation_key() == self._evaluated_key:
+            return super().evaluate()
+        with profiler.span('forces'):
+            super().evaluate()
+
+class RemoteProteinSimulation(SceneView, RemoteSimulation):
+    """观察者模式：绘制模拟服务器 (sim_server) 通过共享内存发布的状态"""
+
+def connect(address, timeout=SERVER_START_TIMEOUT):
+    """连接模拟服务器，服务器刚启动时重试到 timeout 秒"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return RemoteProteinSimulation(address)
+        except ConnectionRefusedError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.1)
+
+def start_server(port):
+    """在子进程中启动模拟服务器，本窗口退出时一起结束"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sim_server.py')
+    process = subprocess.Popen([sys.executable, script, '--port', str(port)])
+    atexit.register(process.terminate)
+    return process
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="蛋白质模拟的 OpenGL 窗口和控制面板")
+    parser.add_argument('--connect', default=None, metavar='HOST:PORT',
+                        help="作为观察者连接已运行的模拟服务器 (sim_server.py)，不在本进程中计算物理")
+    parser.add_argument('--server', action='store_true',
+                        help="启动一个模拟服务器子进程并作为观察者连接，其他窗口可用 --connect 加入")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="--server 启动的服务器端口")
+    return parser.parse_known_args(argv)
 
 def init_gl(width, height):
     glClearColor(0.0, 0.0, 0.0, 0.0)
@@ -294,15 +431,24 @@ def init_gl(width, height):
 
 def display():
     global simulation
-    simulation.update()
-    simulation.draw()
+    with profiler.span('draw'):
+        simulation.draw()
 
 def keyboard(key, x, y):
     global simulation
     if key == b'q':
         sys.exit()
     elif key == b'r':  # 重置模拟
-        simulation = ProteinSimulation()
+        if scheduler is None:
+            simulation.reset_simulation()  # 观察者请求服务器重置
+        else:
+            simulation = ProteinSimulation()
+    elif key == b'p':  # 开关帧耗时统计和叠加显示
+        profiler.toggle()
+    elif key == b'o':  # 导出帧耗时统计
+        profiler.dump(FRAME_TIMINGS_FILE)
+    elif key == b'c':  # 用 cProfile 记录接下来的若干帧
+        profiler.start_profile(PROFILE_FILE)
     glutPostRedisplay()
 
 def special(key, x, y):
@@ -359,15 +505,26 @@ def mouseWheel(button, dir, x, y):
     glutPostRedisplay()
 
 def main():
-    global simulation, control_panel
-    glutInit(sys.argv)
+    global simulation, control_panel, scheduler
+    args, glut_args = parse_args()
+    glutInit([sys.argv[0], *glut_args])
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(800, 600)
     glutCreateWindow(b"Protein Simulation")
     
     init_gl(800, 600)
-    simulation = ProteinSimulation()
-    control_panel = ControlPanel(simulation)
+    if args.server:
+        start_server(args.port)
+        args.connect = f"localhost:{args.port}"
+    if args.connect:
+        # 观察者：物理在服务器进程中运行，本进程只读取状态并绘制；面板显示服务器的物理步速
+        simulation = connect(parse_address(args.connect))
+        scheduler = None
+        control_panel = ControlPanel(simulation, simulation)
+    else:
+        simulation = ProteinSimulation()
+        scheduler = FixedTimestepScheduler(PHYSICS_DT, PHYSICS_SUBSTEPS, FRAME_RATE)
+        control_panel = ControlPanel(simulation, scheduler)
     
     glutDisplayFunc(display)
     glutIdleFunc(idle)  # 使用新的idle函数
@@ -386,13 +543,29 @@ def main():
     light_position = [10.0, 10.0, 10.0, 1.0]
     glLightfv(GL_LIGHT0, GL_POSITION, light_position)
     
+    # 上传顶点缓冲的实例化渲染，不支持时退回立即模式
+    SceneView.renderer = create_renderer()
+    
     glutMainLoop()
 
 def idle():
     global control_panel
-    simulation.update()
-    control_panel.update()
-    glutPostRedisplay()
+    if scheduler is None:
+        # 观察者只读取服务器发布的最新一帧，没有新帧时不重绘
+        with profiler.span('sync'):
+            new_frame = simulation.poll()
+    else:
+        # 按墙钟时间推进固定步长的物理，与 GLUT 回调频率和面板刷新耗时无关
+        with profiler.span('physics'):
+            scheduler.advance(simulation)
+        new_frame = True
+    with profiler.span('panel'):
+        control_panel.update()
+    profiler.end_frame()
+    if new_frame:
+        glutPostRedisplay()
+    else:
+        time.sleep(0.001)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,426 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""独立进程运行的模拟服务器，与绘制窗口 (观察者) 分离
+
+服务器进程只推进物理，按 publish_rate 把位置、颜色、连线和能量写入共享内存中的双缓冲区；
+每个观察者进程只读地附加同一块共享内存，按自己的帧率绘制，绘制再慢也不会拖慢物理。
+参数修改 (滑块、积分方法、粒子数、重置) 通过本地 socket 发回服务器，在两步之间生效。
+
+    python sim_server.py --n 500 --port 6001
+    python protein_simulation.py --connect localhost:6001   (可以同时打开多个)
+
+共享内存布局：头部 HEADER_FIELDS (int64)，之后是两个缓冲区，每个包含
+META_FIELDS (float64)、位置和颜色 (float32[capacity, 3])、连线 (int32[pair_capacity, 2])。
+sequence 为最近一次写完的缓冲区序号，数据在缓冲区 sequence % 2 中；服务器总是写另一个缓冲区，
+写完后再递增 sequence。读取方复制数据前后各读一次 sequence，不一致说明读取期间服务器
+又开始写这个缓冲区，重新读取即可 (seqlock)，读写双方都不需要加锁。
+"""
+
+import queue
+import threading
+import time
+from multiprocessing import AuthenticationError, resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener, wait
+import numpy as np
+from fixed_timestep import FixedTimestepScheduler
+from protein_physics import ProteinPhysics
+from protein_headless import build_parser, create_simulation
+
+DEFAULT_PORT = 6001
+AUTHKEY = b'protein-simulation'
+# 共享内存按此粒子数和连线数分配，超出的粒子数会被限制，超出的连线不发布
+DEFAULT_CAPACITY = 1000
+DEFAULT_PAIR_CAPACITY = 1 << 20
+# 每秒发布到共享内存的帧数
+PUBLISH_RATE = 60.0
+
+HEADER_FIELDS = ('sequence', 'capacity', 'pair_capacity', 'closed')
+META_FIELDS = ('num_particles', 'num_pairs', 'step_count', 'kinetic_energy', 'potential_energy',
+               'energy_drift', 'steps_per_second', 'target_steps_per_second')
+# 观察者可以修改的模拟参数 (与控制面板的滑块对应)
+REMOTE_PARAMETERS = ('k', 'damping', 'interaction_distance')
+
+class SharedFrames:
+    """共享内存中的双缓冲帧，由服务器创建和写入，观察者附加后只读"""
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((len(HEADER_FIELDS),), dtype=np.int64, buffer=shm.buf)
+        capacity = int(self.header[1])
+        pair_capacity = int(self.header[2])
+        self.capacity = capacity
+        self.pair_capacity = pair_capacity
+        self.buffers = []
+        offset = self.header.nbytes
+        for _ in range(2):
+            arrays = {}
+            for name, shape, dtype in (('meta', (len(META_FIELDS),), np.float64),
+                                       ('positions', (capacity, 3), np.float32),
+                                       ('colors', (capacity, 3), np.float32),
+                                       ('pairs', (pair_capacity, 2), np.int32)):
+                arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+                offset += arrays[name].nbytes
+            self.buffers.append(arrays)
+        self._last_sequence = -1
+
+    @staticmethod
+    def nbytes(capacity, pair_capacity):
+        per_buffer = len(META_FIELDS) * 8 + 2 * capacity * 3 * 4 + pair_capacity * 2 * 4
+        return len(HEADER_FIELDS) * 8 + 2 * per_buffer
+
+    @classmethod
+    def create(cls, capacity, pair_capacity):
+        shm = shared_memory.SharedMemory(create=True, size=cls.nbytes(capacity, pair_capacity))
+        header = np.ndarray((len(HEADER_FIELDS),), dtype=np.int64, buffer=shm.buf)
+        header[:] = (0, capacity, pair_capacity, 0)
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        # 共享内存由服务器负责释放；不取消登记的话，观察者退出时资源跟踪进程会把它删除
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def closed(self):
+        return bool(self.header[3])
+
+    def publish(self, simulation, stats):
+        """把模拟的当前状态写入后台缓冲区，然后递增 sequence 使其成为最新的一帧"""
+        sequence = int(self.header[0])
+        buffer = self.buffers[(sequence + 1) % 2]
+        n = min(simulation.num_particles, self.capacity)
+        T, V = simulation.calculate_energies()
+        i, j = simulation.bond_pairs
+        # 只发布两端都在容量内的连线
+        keep = (i < n) & (j < n)
+        i, j = i[keep][:self.pair_capacity], j[keep][:self.pair_capacity]
+        buffer['positions'][:n] = simulation.positions[:n]
+        buffer['colors'][:n] = simulation.particle_colors()[:n]
+        buffer['pairs'][:len(i), 0] = i
+        buffer['pairs'][:len(j), 1] = j
+        buffer['meta'][:] = (n, len(i), simulation.step_count, T, V, simulation.energy_drift(),
+                             stats['achieved_steps_per_second'], stats['target_steps_per_second'])
+        self.header[0] = sequence + 1
+
+    def read(self):
+        """读取最新的一帧，返回 dict；自上次读取以来没有新帧时返回 None"""
+        while True:
+            sequence = int(self.header[0])
+            if sequence == self._last_sequence or sequence == 0:
+                return None
+            buffer = self.buffers[sequence % 2]
+            meta = buffer['meta'].copy()
+            n = int(meta[0])
+            num_pairs = int(meta[1])
+            frame = {
+                'positions': buffer['positions'][:n].copy(),
+                'colors': buffer['colors'][:n].copy(),
+                'pairs': buffer['pairs'][:num_pairs].copy(),
+                **dict(zip(META_FIELDS, meta)),
+            }
+            if int(self.header[0]) == sequence:
+                self._last_sequence = sequence
+                return frame
+
+    def close(self):
+        """观察者只关闭映射；服务器另外标记结束并删除共享内存"""
+        if self.owner:
+            self.header[3] = 1
+        self.header = None
+        self.buffers = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class SimulationServer:
+    """在本进程中推进模拟，发布到共享内存，并处理观察者发来的参数修改
+
+    steps_per_second 为 None 时物理全速运行，否则由 FixedTimestepScheduler 按墙钟时间限速。
+    """
+    def __init__(self, simulation, dt=0.01, port=DEFAULT_PORT, capacity=DEFAULT_CAPACITY,
+                 pair_capacity=DEFAULT_PAIR_CAPACITY, steps_per_second=None, publish_rate=PUBLISH_RATE):
+        self.simulation = simulation
+        self.dt = dt
+        self.publish_interval = 1.0 / publish_rate
+        self.capacity = capacity
+        self.frames = SharedFrames.create(capacity, pair_capacity)
+        self.scheduler = None
+        if steps_per_second:
+            self.scheduler = FixedTimestepScheduler(dt, substeps=1, frame_rate=steps_per_second)
+        self.listener = Listener(('localhost', port), authkey=AUTHKEY)
+        self.connections = []
+        self._new_connections = queue.Queue()
+        self.running = False
+        self._rate_start = None
+        self._rate_steps = 0
+        self.achieved_steps_per_second = 0.0
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def _accept_loop(self):
+        """后台线程：接受观察者连接，交给主循环发送初始信息"""
+        while self.running:
+            try:
+                self._new_connections.put(self.listener.accept())
+            except (AuthenticationError, EOFError):
+                continue  # 认证失败的连接直接丢弃
+            except OSError:
+                return  # 监听 socket 已关闭
+
+    def hello(self):
+        """新观察者连接时发送的信息：共享内存名称和当前参数"""
+        return ('hello', {'shm': self.frames.name, 'capacity': self.capacity,
+                          'dt': self.dt, 'params': self.params()})
+
+    def params(self):
+        simulation = self.simulation
+        params = {name: getattr(simulation, name) for name in REMOTE_PARAMETERS}
+        params.update(num_particles=simulation.num_particles, integrator=simulation.integrator,
+                      topology=None if simulation.topology is None else repr(simulation.topology))
+        return params
+
+    def broadcast(self, message):
+        for conn in list(self.connections):
+            try:
+                conn.send(message)
+            except OSError:
+                self.connections.remove(conn)
+
+    def apply(self, message):
+        """在两步之间执行一条参数修改，返回服务器是否继续运行"""
+        command, *args = message
+        simulation = self.simulation
+        if command == 'set' and args[0] in REMOTE_PARAMETERS:
+            setattr(simulation, args[0], float(args[1]))
+        elif command == 'num_particles' and simulation.topology is None:
+            simulation.set_num_particles(max(1, min(int(args[0]), self.capacity)))
+        elif command == 'integrator':
+            simulation.set_integrator(args[0])
+        elif command == 'reset':
+            simulation.reset_simulation()
+        elif command == 'stop':
+            return False
+        return True
+
+    def handle_messages(self):
+        """处理新连接和所有已到达的消息，参数变化后广播给全部观察者"""
+        while not self._new_connections.empty():
+            conn = self._new_connections.get()
+            conn.send(self.hello())
+            self.connections.append(conn)
+        if not self.connections:
+            return
+        changed = False
+        for conn in wait(self.connections, timeout=0):
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                self.connections.remove(conn)  # 观察者已退出
+                continue
+            try:
+                if not self.apply(message):
+                    self.running = False
+            except ValueError as e:
+                print(f"忽略无效的参数修改 {message}: {e}")
+            changed = True
+        if changed:
+            self.broadcast(('params', self.params()))
+
+    def step(self):
+        """推进物理，返回本次推进的步数"""
+        if self.scheduler is not None:
+            steps = self.scheduler.advance(self.simulation)
+            if steps == 0:
+                time.sleep(0.0005)  # 限速运行时不空转
+            return steps
+        self.simulation.update(self.dt)
+        return 1
+
+    def stats(self):
+        target = self.scheduler.steps_per_second if self.scheduler is not None else 0.0
+        return {'achieved_steps_per_second': self.achieved_steps_per_second,
+                'target_steps_per_second': target}
+
+    def _update_rate(self, now, steps):
+        """每秒统计一次实际物理步速"""
+        self._rate_steps += steps
+        elapsed = now - self._rate_start
+        if elapsed >= 1.0:
+            self.achieved_steps_per_second = self._rate_steps / elapsed
+            self._rate_start = now
+            self._rate_steps = 0
+
+    def serve(self, max_steps=0):
+        """运行到收到 stop 消息 (或达到 max_steps 步，0 表示不限)"""
+        self.running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        self._rate_start = last_publish = time.perf_counter()
+        self.frames.publish(self.simulation, self.stats())
+        try:
+            while self.running and not (max_steps and self.simulation.step_count >= max_steps):
+                self.handle_messages()
+                steps = self.step()
+                now = time.perf_counter()
+                self._update_rate(now, steps)
+                if now - last_publish >= self.publish_interval:
+                    last_publish = now
+                    self.frames.publish(self.simulation, self.stats())
+        finally:
+            self.close()
+
+    def close(self):
+        self.running = False
+        self.listener.close()
+        for conn in self.connections:
+            conn.close()
+        self.connections = []
+        self.frames.close()
+        self.simulation.close()
+
+class RemoteSimulation:
+    """观察者一侧的模拟代理，提供控制面板和绘制需要的接口
+
+    状态从共享内存读取 (poll)，参数修改通过 socket 发给服务器，
+    其余观察者在服务器广播新参数后同步。
+    """
+    reset_camera = ProteinPhysics.reset_camera
+
+    def __init__(self, address=('localhost', DEFAULT_PORT)):
+        self._conn = Client(address, authkey=AUTHKEY)
+        _, hello = self._conn.recv()
+        self.frames = SharedFrames.attach(hello['shm'])
+        self.capacity = hello['capacity']
+        self.dt = hello['dt']
+        self._apply_params(hello['params'])
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.colors = np.zeros((0, 3), dtype=np.float32)
+        self.bond_pairs = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+        self.frame = None
+        self.connected = True
+        self.reset_camera()
+        # 等待服务器发布的第一帧
+        while not self.poll():
+            time.sleep(0.01)
+
+    def _apply_params(self, params):
+        for name, value in params.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        # 控制面板用 setattr 修改参数，这里转发给服务器
+        if name in REMOTE_PARAMETERS:
+            self.send('set', name, value)
+        object.__setattr__(self, name, value)
+
+    def send(self, *message):
+        if not self.connected:
+            return
+        try:
+            self._conn.send(message)
+        except OSError:
+            self.connected = False
+
+    def poll(self):
+        """接收服务器广播的参数并读取最新一帧，有新帧时返回 True"""
+        while self.connected:
+            try:
+                if not self._conn.poll():
+                    break
+                kind, payload = self._conn.recv()
+            except (EOFError, OSError):
+                self.connected = False  # 服务器已退出，保留最后一帧
+                break
+            if kind == 'params':
+                self._apply_params(payload)
+        if self.frames.header is None or self.frames.closed:
+            return False
+        frame = self.frames.read()
+        if frame is None:
+            return False
+        self.frame = frame
+        self.positions = frame['positions']
+        self.colors = frame['colors']
+        self.bond_pairs = (frame['pairs'][:, 0], frame['pairs'][:, 1])
+        self.num_particles = len(self.positions)
+        self.step_count = int(frame['step_count'])
+        return True
+
+    def evaluate(self):
+        """连线随帧一起发布，不需要在本地计算"""
+
+    def particle_colors(self):
+        return self.colors
+
+    def calculate_energies(self):
+        return self.frame['kinetic_energy'], self.frame['potential_energy']
+
+    def energy_drift(self):
+        return self.frame['energy_drift']
+
+    def stats(self):
+        """服务器的物理步速，接口与 FixedTimestepScheduler.stats 相同，供控制面板显示；
+        服务器全速运行时目标步速为 0"""
+        return {'achieved_steps_per_second': self.frame['steps_per_second'],
+                'target_steps_per_second': self.frame['target_steps_per_second']}
+
+    def set_num_particles(self, num_particles):
+        self.send('num_particles', num_particles)
+
+    def set_integrator(self, name):
+        self.send('integrator', name)
+
+    def reset_simulation(self):
+        self.send('reset')
+
+    def stop_server(self):
+        self.send('stop')
+
+    def close(self):
+        self._conn.close()
+        self.frames.close()
+
+def parse_address(text):
+    """把 "host:port" 或 "port" 解析为 (host, port)"""
+    host, _, port = text.rpartition(':')
+    return (host or 'localhost', int(port))
+
+def parse_args(argv=None):
+    parser = build_parser("运行模拟服务器，通过共享内存向观察者发布状态")
+    parser.set_defaults(steps=0)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="接收观察者连接的本地端口")
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY,
+                        help="共享内存可容纳的最大粒子数")
+    parser.add_argument('--max-pairs', type=int, default=DEFAULT_PAIR_CAPACITY,
+                        help="共享内存可容纳的最大连线数")
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help="目标物理步速 (步/秒)，0 表示全速运行")
+    parser.add_argument('--publish-rate', type=float, default=PUBLISH_RATE,
+                        help="每秒发布到共享内存的帧数")
+    return parser.parse_args(argv)
+
+def run_server(args):
+    """按命令行参数创建模拟并运行服务器，--steps 为 0 时一直运行到收到 stop"""
+    simulation = create_simulation(args)
+    capacity = max(args.capacity, simulation.num_particles)
+    server = SimulationServer(simulation, args.dt, args.port, capacity, args.max_pairs,
+                              args.rate or None, args.publish_rate)
+    print(f"模拟服务器: {server.address[0]}:{server.address[1]}  共享内存: {server.frames.name}  "
+          f"粒子数: {simulation.num_particles}")
+    server.serve(args.steps)
+
+def main(argv=None):
+    run_server(parse_args(argv))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""不依赖 OpenGL 的软件渲染，把轨迹逐帧绘制成图片序列或原始 RGB 视频流
+
+相机与 OpenGL 窗口一致：模型视图为 平移(translate_x, translate_y, zoom) · 绕 x 轴旋转 rotate_x ·
+绕 y 轴旋转 rotate_y，投影为 gluPerspective(45°, 宽 / 高, 0.1, 100)，光源位于视点坐标 (10, 10, 10)。
+粒子按投影后的像素半径绘制成带漫反射明暗的圆盘，连线按像素步进采样；
+所有片元 (像素, 深度, 颜色) 一次生成，用 np.minimum.at 做向量化的深度缓冲，每个像素保留最近的片元。
+
+    python soft_renderer.py run.ptrj --out frames/frame_%05d.png
+    python soft_renderer.py run.ptrj --pipe | ffmpeg -f rawvideo -pix_fmt rgb24 -s 640x480 -r 30 -i - run.mp4
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+import numpy as np
+from neighbor_search import CellList
+from protein_physics import COLOR_PALETTE
+from trajectory import TrajectoryReader
+
+# 与 gl_renderer.PARTICLE_RADIUS 和 init_gl 中的投影参数一致
+PARTICLE_RADIUS = 0.3
+FIELD_OF_VIEW = 45.0
+NEAR_PLANE = 0.1
+FAR_PLANE = 100.0
+LIGHT_POSITION = np.array([10.0, 10.0, 10.0])
+BOND_COLOR = np.array([128, 128, 128], dtype=np.uint8)
+# 相机参数，默认值同 ProteinPhysics.reset_camera
+CAMERA_ATTRIBUTES = ('rotate_x', 'rotate_y', 'translate_x', 'translate_y', 'zoom')
+
+def rotation_x(degrees):
+    c, s = np.cos(np.radians(degrees)), np.sin(np.radians(degrees))
+    return np.array([[1.0, 0.0, 0.0], [0.0, c, -s], [0.0, s, c]])
+
+def rotation_y(degrees):
+    c, s = np.cos(np.radians(degrees)), np.sin(np.radians(degrees))
+    return np.array([[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]])
+
+class Camera:
+    """OpenGL 窗口的相机参数，可从模拟对象 (ProteinSimulation 等) 读取"""
+    def __init__(self, rotate_x=0.0, rotate_y=0.0, translate_x=0.0, translate_y=0.0, zoom=-30.0):
+        self.rotate_x = rotate_x
+        self.rotate_y = rotate_y
+        self.translate_x = translate_x
+        self.translate_y = translate_y
+        self.zoom = zoom
+
+    @classmethod
+    def from_simulation(cls, simulation):
+        return cls(**{name: getattr(simulation, name) for name in CAMERA_ATTRIBUTES})
+
+    def to_eye(self, positions):
+        """世界坐标变换到视点坐标 (相机朝 -z 方向)"""
+        rotation = rotation_x(self.rotate_x) @ rotation_y(self.rotate_y)
+        translation = np.array([self.translate_x, self.translate_y, self.zoom])
+        return np.asarray(positions, dtype=np.float64) @ rotation.T + translation
+
+def disc_offsets(radius):
+    """半径为 radius 像素的圆盘内的像素偏移 (dx, dy) 和球面法向量 (x, y, z)，y 轴向上"""
+    r = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(r, r)
+    x = dx.ravel() / (radius + 0.5)
+    y = -dy.ravel() / (radius + 0.5)
+    inside = x * x + y * y <= 1.0
+    normals = np.stack([x[inside], y[inside], np.sqrt(1.0 - x[inside]**2 - y[inside]**2)], axis=1)
+    return dx.ravel()[inside], dy.ravel()[inside], normals
+
+class SoftwareRenderer:
+    """把粒子和连线光栅化到 (height, width, 3) 的 uint8 RGB 帧缓冲"""
+    def __init__(self, width=640, height=480, background=(0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.focal = 1.0 / np.tan(np.radians(FIELD_OF_VIEW) / 2)
+        # 各像素半径的圆盘偏移，按需生成后缓存
+        self._discs = {}
+        self.framebuffer = np.empty((height, width, 3), dtype=np.uint8)
+        # 背景色的整帧，每帧直接复制，比按像素广播赋值快得多
+        self.clear_frame = np.empty_like(self.framebuffer)
+        self.clear_frame[:] = np.asarray(background, dtype=np.uint8)
+        self.depth = np.empty(height * width)
+
+    def project(self, eye):
+        """视点坐标投影到像素坐标，返回 (x, y, 到视点的深度 -z)"""
+        depth = -eye[:, 2]
+        scale = self.focal * 0.5 * self.height / np.maximum(depth, NEAR_PLANE)
+        # gluPerspective 的横向缩放为 focal / aspect，换算成像素后与纵向相同
+        x = 0.5 * self.width + eye[:, 0] * scale
+        y = 0.5 * self.height - eye[:, 1] * scale
+        return x, y, depth
+
+    def _disc(self, radius):
+        if radius not in self._discs:
+            self._discs[radius] = disc_offsets(radius)
+        return self._discs[radius]
+
+    def sphere_fragments(self, eye, colors):
+        """粒子圆盘的片元 (像素 x, 像素 y, 深度, uint8 颜色)，按像素半径分组向量化生成"""
+        x, y, depth = self.project(eye)
+        visible = (depth > NEAR_PLANE) & (depth < FAR_PLANE)
+        radius_px = PARTICLE_RADIUS * self.focal * 0.5 * self.height / np.maximum(depth, NEAR_PLANE)
+        radius_px = np.clip(np.rint(radius_px), 0, max(self.width, self.height)).astype(np.int64)
+        fragments = []
+        for radius in np.unique(radius_px[visible]):
+            group = np.nonzero(visible & (radius_px == radius))[0]
+            dx, dy, normals = self._disc(int(radius))
+            px = np.rint(x[group])[:, np.newaxis].astype(np.int64) + dx
+            py = np.rint(y[group])[:, np.newaxis].astype(np.int64) + dy
+            # 球面上的点比球心更靠近视点 R * n_z
+            frag_depth = depth[group][:, np.newaxis] - PARTICLE_RADIUS * normals[:, 2]
+            # 与着色器相同的明暗：0.2 环境光 + 0.8 漫反射，光线方向按球心计算
+            light = LIGHT_POSITION - eye[group]
+            light /= np.linalg.norm(light, axis=1)[:, np.newaxis]
+            diffuse = np.maximum(light @ normals.T, 0.0)
+            shade = 0.2 + 0.8 * diffuse
+            frag_colors = colors[group][:, np.newaxis, :] * (255.0 * shade[:, :, np.newaxis]) + 0.5
+            frag_colors = np.clip(frag_colors, 0, 255).astype(np.uint8)
+            fragments.append((px.ravel(), py.ravel(), frag_depth.ravel(), frag_colors.reshape(-1, 3)))
+        return fragments
+
+    def line_fragments(self, eye, pairs):
+        """连线的片元：每条线按较长的像素跨度逐像素采样，深度在两端之间线性插值，颜色为单个值"""
+        i, j = pairs
+        if len(i) == 0:
+            return []
+        x, y, depth = self.project(eye)
+        visible = (depth[i] > NEAR_PLANE) & (depth[j] > NEAR_PLANE)
+        i, j = i[visible], j[visible]
+        x0, y0, d0 = x[i], y[i], depth[i]
+        x1, y1, d1 = x[j], y[j], depth[j]
+        lengths = np.ceil(np.maximum(np.abs(x1 - x0), np.abs(y1 - y0))).astype(np.int64)
+        lengths = np.minimum(lengths, 2 * max(self.width, self.height)) + 1
+        # 所有线的采样点拼在一起：line 为所属的线，t 为线内的参数
+        line = np.repeat(np.arange(len(i)), lengths)
+        starts = np.cumsum(lengths) - lengths
+        t = (np.arange(len(line)) - starts[line]) / np.maximum(lengths - 1, 1)[line]
+        px = np.rint(x0[line] + (x1 - x0)[line] * t).astype(np.int64)
+        py = np.rint(y0[line] + (y1 - y0)[line] * t).astype(np.int64)
+        frag_depth = d0[line] + (d1 - d0)[line] * t
+        # 所有连线同一种颜色，只存一个颜色值
+        return [(px, py, frag_depth, BOND_COLOR)]
+
+    def render(self, positions, colors, bond_pairs=None, camera=None):
+        """绘制一帧，返回帧缓冲 (下一次调用时会被覆盖)"""
+        camera = camera or Camera()
+        eye = camera.to_eye(positions)
+        colors = np.asarray(colors, dtype=np.float64)
+        fragments = self.sphere_fragments(eye, colors)
+        if bond_pairs is not None:
+            fragments += self.line_fragments(eye, bond_pairs)
+
+        np.copyto(self.framebuffer, self.clear_frame)
+        self.depth.fill(np.inf)
+        # 去掉画面外的片元，然后用深度缓冲记录每个像素的最小深度
+        visible = []
+        for px, py, frag_depth, frag_colors in fragments:
+            inside = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+            pixel = (py * self.width + px)[inside]
+            frag_depth = frag_depth[inside]
+            if frag_colors.ndim == 2:
+                frag_colors = frag_colors[inside]
+            np.minimum.at(self.depth, pixel, frag_depth)
+            visible.append((pixel, frag_depth, frag_colors))
+
+        # 只写入深度等于该像素最小深度的片元
+        flat = self.framebuffer.reshape(-1, 3)
+        for pixel, frag_depth, frag_colors in visible:
+            nearest = frag_depth == self.depth[pixel]
+            flat[pixel[nearest]] = frag_colors[nearest] if frag_colors.ndim == 2 else frag_colors
+        return self.framebuffer
+
+    def render_simulation(self, simulation):
+        """按模拟对象当前的相机参数绘制当前状态，连线复用受力计算缓存的粒子对"""
+        simulation.evaluate()
+        return self.render(simulation.positions, simulation.particle_colors(),
+                           simulation.bond_pairs, Camera.from_simulation(simulation))
+
+def find_pairs(positions, cutoff):
+    """作用距离内的粒子对，用于在没有受力缓存的轨迹帧上绘制连线"""
+    cell_list = CellList(cutoff)
+    cell_list.build(positions, cutoff)
+    pairs = [(i, j) for i, j, _, _ in cell_list.iter_pairs(positions, cutoff)]
+    if not pairs:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate([i for i, _ in pairs]), np.concatenate([j for _, j in pairs])
+
+def write_ppm(path, image):
+    height, width, _ = image.shape
+    with open(path, 'wb') as f:
+        f.write(b'P6\n%d %d\n255\n' % (width, height))
+        f.write(np.ascontiguousarray(image).tobytes())
+
+def write_png(path, image, level=1):
+    """不依赖图像库的 PNG 编码 (每行无滤波，zlib 压缩)"""
+    height, width, _ = image.shape
+    rows = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(rows.tobytes(), level)))
+        f.write(chunk(b'IEND', b''))
+
+# 按扩展名选择图片格式
+IMAGE_WRITERS = {'.png': write_png, '.ppm': write_ppm}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="不使用 OpenGL 把轨迹文件逐帧渲染成图片或原始视频流")
+    parser.add_argument('trajectory', help="轨迹文件 (protein_headless.py --trajectory 的输出)")
+    parser.add_argument('--out', default=None,
+                        help="图片文件名模板，例如 frames/frame_%%05d.png (.png 或 .ppm)")
+    parser.add_argument('--pipe', action='store_true',
+                        help="把 rgb24 原始帧写到标准输出，可直接交给 ffmpeg 编码")
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--start', type=int, default=0, help="第一帧的序号")
+    parser.add_argument('--stop', type=int, default=None, help="结束帧的序号 (不含)")
+    parser.add_argument('--every', type=int, default=1, help="每隔多少帧渲染一帧")
+    parser.add_argument('--cutoff', type=float, default=5.0, help="绘制连线的作用距离，0 表示不画连线")
+    parser.add_argument('--rotate-x', type=float, default=0.0)
+    parser.add_argument('--rotate-y', type=float, default=0.0)
+    parser.add_argument('--translate-x', type=float, default=0.0)
+    parser.add_argument('--translate-y', type=float, default=0.0)
+    parser.add_argument('--zoom', type=float, default=-30.0)
+    parser.add_argument('--spin', type=float, default=0.0, help="每帧绕 y 轴额外旋转的角度")
+    args = parser.parse_args(argv)
+    if not args.out and not args.pipe:
+        parser.error("需要 --out 或 --pipe")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    reader = TrajectoryReader(args.trajectory)
+    renderer = SoftwareRenderer(args.width, args.height)
+    camera = Camera(args.rotate_x, args.rotate_y, args.translate_x, args.translate_y, args.zoom)
+    # 轨迹中没有保存颜色，按粒子编号从调色板取用 (同紧凑模式)
+    colors = COLOR_PALETTE[np.arange(reader.num_particles) % len(COLOR_PALETTE)]
+    if args.out:
+        directory = os.path.dirname(args.out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_image = IMAGE_WRITERS.get(os.path.splitext(args.out)[1].lower(), write_png)
+    output = sys.stdout.buffer
+
+    # 结束帧超出轨迹长度时只渲染到最后一帧
+    stop = len(reader) if args.stop is None else min(args.stop, len(reader))
+    count = 0
+    start = time.perf_counter()
+    for index in range(args.start, stop, args.every):
+        _, positions, _ = reader.frame(index)
+        positions = np.asarray(positions, dtype=np.float64)
+        pairs = find_pairs(positions, args.cutoff) if args.cutoff > 0 else None
+        image = renderer.render(positions, colors, pairs, camera)
+        if args.pipe:
+            output.write(image.tobytes())
+        if args.out:
+            write_image(args.out % count, image)
+        count += 1
+        camera.rotate_y += args.spin
+    elapsed = time.perf_counter() - start
+    # 状态信息写到标准错误，不混入视频流
+    print(f"渲染 {count} 帧，{count / max(elapsed, 1e-12):.1f} 帧/秒", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""蛋白质主链的成键拓扑：键长、键角和可选的天然接触
+
+拓扑以紧凑的下标数组 (边列表) 存储，成键力按项向量化计算后用 bincount 累加到粒子上，
+代价为 O(键数)，与非键的截断弹簧力分开计算。拓扑文件为 .npz，键名见 TOPOLOGY_ARRAYS。
+"""
+
+import numpy as np
+from neighbor_search import CellList
+
+# 拓扑文件中保存的数组
+TOPOLOGY_ARRAYS = ('bonds', 'bond_lengths', 'bond_k',
+                   'angles', 'angle_values', 'angle_k',
+                   'contacts', 'contact_distances', 'contact_k')
+
+def scatter_add(num_particles, index, values):
+    """把每项的向量 values[m] 累加到粒子 index[m] 上，返回 (num_particles, 3)"""
+    forces = np.empty((num_particles, 3))
+    for axis in range(3):
+        forces[:, axis] = np.bincount(index, values[:, axis], minlength=num_particles)
+    return forces
+
+def harmonic_pair_terms(num_particles, positions, pairs, lengths, k):
+    """两体谐振项 0.5 * k * (|r_ij| - l)^2 的受力和能量"""
+    if len(pairs) == 0:
+        return np.zeros((num_particles, 3)), 0.0
+    i, j = pairs[:, 0], pairs[:, 1]
+    r = positions[i] - positions[j]
+    d = np.sqrt(np.einsum('ij,ij->i', r, r))
+    stretch = d - lengths
+    # F_i = -k * (|r| - l) * r / |r|，F_j 与之等大反向
+    f = (-k * stretch / np.maximum(d, 1e-12))[:, np.newaxis] * r
+    forces = scatter_add(num_particles, i, f) - scatter_add(num_particles, j, f)
+    return forces, 0.5 * np.sum(k * stretch**2)
+
+def harmonic_angle_terms(num_particles, positions, angles, values, k):
+    """键角项 0.5 * k * (theta - theta0)^2 的受力和能量，theta 为 i-j-l 在 j 处的夹角"""
+    if len(angles) == 0:
+        return np.zeros((num_particles, 3)), 0.0
+    i, j, l = angles[:, 0], angles[:, 1], angles[:, 2]
+    u = positions[i] - positions[j]
+    v = positions[l] - positions[j]
+    u_norm = np.sqrt(np.einsum('ij,ij->i', u, u))
+    v_norm = np.sqrt(np.einsum('ij,ij->i', v, v))
+    cos_theta = np.clip(np.einsum('ij,ij->i', u, v) / (u_norm * v_norm), -1.0, 1.0)
+    theta = np.arccos(cos_theta)
+    sin_theta = np.maximum(np.sqrt(1.0 - cos_theta**2), 1e-8)
+    # dtheta/dx_i = -(v / (|u| |v|) - cos * u / |u|^2) / sin，x_l 同理，x_j 受力为两者之和的相反数
+    coef = (k * (theta - values) / sin_theta)[:, np.newaxis]
+    uv = (u_norm * v_norm)[:, np.newaxis]
+    cos_theta = cos_theta[:, np.newaxis]
+    f_i = coef * (v / uv - cos_theta * u / (u_norm**2)[:, np.newaxis])
+    f_l = coef * (u / uv - cos_theta * v / (v_norm**2)[:, np.newaxis])
+    forces = (scatter_add(num_particles, i, f_i) + scatter_add(num_particles, l, f_l)
+              - scatter_add(num_particles, j, f_i + f_l))
+    return forces, 0.5 * np.sum(k * (theta - values)**2)
+
+class Topology:
+    """成键拓扑，所有项都以数组存储：
+
+    bonds (B, 2)、bond_lengths (B,)、bond_k (B,)
+    angles (A, 3)、angle_values (A,) 平衡键角 (弧度)、angle_k (A,)
+    contacts (C, 2)、contact_distances (C,)、contact_k (C,)  可选的天然接触
+    """
+    def __init__(self, num_particles, bonds=None, bond_lengths=None, bond_k=None,
+                 angles=None, angle_values=None, angle_k=None,
+                 contacts=None, contact_distances=None, contact_k=None):
+        self.num_particles = int(num_particles)
+        self.bonds, self.bond_lengths, self.bond_k = self._terms(bonds, 2, bond_lengths, bond_k)
+        self.angles, self.angle_values, self.angle_k = self._terms(angles, 3, angle_values, angle_k)
+        self.contacts, self.contact_distances, self.contact_k = self._terms(
+            contacts, 2, contact_distances, contact_k)
+
+    def _terms(self, index, width, values, k):
+        """把一类成键项整理为 (int32 下标, 平衡值, 力常数)，标量参数广播到每一项"""
+        index = np.zeros((0, width), dtype=np.int32) if index is None else np.asarray(index, dtype=np.int32)
+        if index.ndim != 2 or index.shape[1] != width:
+            raise ValueError(f"成键项下标的形状应为 (M, {width})")
+        if len(index) and (index.min() < 0 or index.max() >= self.num_particles):
+            raise ValueError("成键项下标超出粒子范围")
+        values = np.broadcast_to(np.asarray(0.0 if values is None else values, dtype=np.float64),
+                                 (len(index),)).copy()
+        k = np.broadcast_to(np.asarray(0.0 if k is None else k, dtype=np.float64),
+                            (len(index),)).copy()
+        return index, values, k
+
+    @classmethod
+    def chain(cls, num_residues, bond_length=1.0, bond_k=100.0, angle=np.deg2rad(110.0), angle_k=20.0):
+        """线性主链：相邻残基成键，相邻三个残基构成键角"""
+        residues = np.arange(num_residues, dtype=np.int32)
+        bonds = np.stack([residues[:-1], residues[1:]], axis=1)
+        angles = np.stack([residues[:-2], residues[1:-1], residues[2:]], axis=1)
+        return cls(num_residues, bonds, bond_length, bond_k, angles, angle, angle_k)
+
+    def add_native_contacts(self, positions, cutoff, k=1.0, min_separation=3):
+        """把参考构象中距离小于 cutoff、沿链相隔至少 min_separation 的残基对设为天然接触"""
+        cell_list = CellList(cutoff)
+        cell_list.build(positions, cutoff)
+        pairs_i, pairs_j, distances = [], [], []
+        for i, j, _, d2 in cell_list.iter_pairs(positions, cutoff):
+            keep = np.abs(i - j) >= min_separation
+            pairs_i.append(i[keep])
+            pairs_j.append(j[keep])
+            distances.append(np.sqrt(d2[keep]))
+        if pairs_i:
+            contacts = np.stack([np.concatenate(pairs_i), np.concatenate(pairs_j)], axis=1)
+            distances = np.concatenate(distances)
+        else:
+            contacts = np.zeros((0, 2), dtype=np.int32)
+        self.contacts, self.contact_distances, self.contact_k = self._terms(contacts, 2, distances, k)
+
+    def initial_positions(self, box_size, rng=np.random):
+        """按残基顺序的随机游走构象，步长取平均键长，平移到边长 box_size 的立方体中心
+
+        适用于按残基编号顺序成键的主链，其他拓扑只是一个粗略的起点。
+        """
+        step_length = self.bond_lengths.mean() if len(self.bonds) else 1.0
+        steps = rng.normal(size=(self.num_particles, 3))
+        steps *= step_length / np.linalg.norm(steps, axis=1)[:, np.newaxis]
+        steps[0] = 0.0
+        positions = np.cumsum(steps, axis=0)
+        return positions - positions.mean(axis=0) + 0.5 * box_size
+
+    def terms(self, positions):
+        """成键力和成键势能 (键长 + 键角 + 天然接触)"""
+        n = self.num_particles
+        positions = np.asarray(positions, dtype=np.float64)
+        forces, energy = harmonic_pair_terms(n, positions, self.bonds, self.bond_lengths, self.bond_k)
+        angle_forces, angle_energy = harmonic_angle_terms(
+            n, positions, self.angles, self.angle_values, self.angle_k)
+        contact_forces, contact_energy = harmonic_pair_terms(
+            n, positions, self.contacts, self.contact_distances, self.contact_k)
+        return forces + angle_forces + contact_forces, energy + angle_energy + contact_energy
+
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in TOPOLOGY_ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, num_particles, arrays):
+        return cls(num_particles, **{name: arrays[name] for name in TOPOLOGY_ARRAYS})
+
+    def save(self, path):
+        np.savez(path, num_particles=self.num_particles, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays(int(data['num_particles']), data)
+
+    def __repr__(self):
+        return (f"Topology(num_particles={self.num_particles}, bonds={len(self.bonds)}, "
+                f"angles={len(self.angles)}, contacts={len(self.contacts)})")
@@ -0,0 +1,172 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import os
+import struct
+import numpy as np
+
+# 轨迹文件格式：
+#   文件头 (HEADER_SIZE 字节)：魔数、版本、粒子数、数据类型、每块帧数、总帧数
+#   之后是若干个大小固定的块，每块依次存放：
+#     steps      int64[frames_per_chunk]                 每帧对应的模拟步数 (块内索引)
+#     positions  dtype[frames_per_chunk, n, 3]
+#     velocities dtype[frames_per_chunk, n, 3]
+# 块大小固定，第 i 帧的位置可以直接算出，读取时无需加载整个文件。
+MAGIC = b'PTRJ'
+VERSION = 1
+HEADER_FORMAT = '<4sIQ4sQQ'
+HEADER_SIZE = 64
+
+def _chunk_layout(num_particles, dtype, frames_per_chunk):
+    """返回 (步数区字节数, 单帧数组字节数, 整块字节数)"""
+    steps_bytes = 8 * frames_per_chunk
+    frame_bytes = num_particles * 3 * np.dtype(dtype).itemsize
+    return steps_bytes, frame_bytes, steps_bytes + 2 * frame_bytes * frames_per_chunk
+
+def _chunk_views(path, mode, offset, num_particles, dtype, frames_per_chunk):
+    """把一个块映射为 (steps, positions, velocities) 三个内存映射数组"""
+    steps_bytes, frame_bytes, _ = _chunk_layout(num_particles, dtype, frames_per_chunk)
+    shape = (frames_per_chunk, num_particles, 3)
+    steps = np.memmap(path, dtype=np.int64, mode=mode, offset=offset, shape=(frames_per_chunk,))
+    positions = np.memmap(path, dtype=dtype, mode=mode, offset=offset + steps_bytes, shape=shape)
+    velocities = np.memmap(path, dtype=dtype, mode=mode,
+                           offset=offset + steps_bytes + frame_bytes * frames_per_chunk, shape=shape)
+    return steps, positions, velocities
+
+class TrajectoryWriter:
+    """把 positions 和 velocities 按固定大小的块追加写入内存映射文件
+
+    每 every 步记录一帧，文件按块增长，内存中只保留当前块的映射。
+    指定 resume_step 时打开已有的轨迹文件继续写入 (从检查点恢复时使用)：
+    文件的粒子数、数据类型和每块帧数必须一致，步数不小于 resume_step 的帧
+    (检查点之后写入的部分) 会被丢弃并重新写入。
+    """
+    def __init__(self, path, num_particles, every=1, frames_per_chunk=64, dtype=np.float32,
+                 resume_step=None):
+        self.path = path
+        self.num_particles = num_particles
+        self.every = every
+        self.frames_per_chunk = frames_per_chunk
+        self.dtype = np.dtype(dtype)
+        self.num_frames = 0
+        self._chunk = None
+        _, _, self.chunk_bytes = _chunk_layout(num_particles, self.dtype, frames_per_chunk)
+        if resume_step is None:
+            with open(self.path, 'wb') as f:
+                f.write(b'\0' * HEADER_SIZE)
+        else:
+            self.num_frames = self._resume_frames(resume_step)
+        self._write_header()
+
+    def _resume_frames(self, resume_step):
+        """检查已有文件的格式，返回步数小于 resume_step 的帧数"""
+        reader = TrajectoryReader(self.path)
+        existing = (reader.num_particles, reader.dtype.name, reader.frames_per_chunk)
+        expected = (self.num_particles, self.dtype.name, self.frames_per_chunk)
+        if existing != expected:
+            raise ValueError(f"轨迹文件 {self.path} 的格式 (粒子数, 数据类型, 每块帧数) 为 {existing}，"
+                             f"与当前的 {expected} 不一致")
+        # 各帧的步数单调递增
+        return int(np.count_nonzero(reader.steps() < resume_step))
+
+    def _write_header(self):
+        header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.num_particles,
+                             self.dtype.str.encode().ljust(4), self.frames_per_chunk, self.num_frames)
+        with open(self.path, 'r+b') as f:
+            f.write(header)
+
+    def _open_chunk(self, chunk_index):
+        """把文件扩展 (或截断) 到第 chunk_index 块末尾并映射该块，块内已有的帧保留"""
+        offset = HEADER_SIZE + chunk_index * self.chunk_bytes
+        with open(self.path, 'r+b') as f:
+            f.truncate(offset + self.chunk_bytes)
+        self._chunk = _chunk_views(self.path, 'r+', offset, self.num_particles,
+                                   self.dtype, self.frames_per_chunk)
+
+    def write_frame(self, step, positions, velocities):
+        """追加一帧"""
+        chunk_index, slot = divmod(self.num_frames, self.frames_per_chunk)
+        if slot == 0 or self._chunk is None:
+            self.flush()
+            self._open_chunk(chunk_index)
+        steps, chunk_positions, chunk_velocities = self._chunk
+        steps[slot] = step
+        chunk_positions[slot] = positions
+        chunk_velocities[slot] = velocities
+        self.num_frames += 1
+
+    def record(self, simulation):
+        """每隔 every 步记录一次模拟的当前状态，返回本次是否写入"""
+        if simulation.step_count % self.every != 0:
+            return False
+        self.write_frame(simulation.step_count, simulation.positions, simulation.velocities)
+        return True
+
+    def flush(self):
+        """把当前块写回磁盘并更新文件头中的帧数"""
+        if self._chunk is not None:
+            for array in self._chunk:
+                array.flush()
+        self._write_header()
+
+    def close(self):
+        self.flush()
+        self._chunk = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TrajectoryReader:
+    """随机读取轨迹文件中的任意一帧，返回的数组直接映射文件内容，不整体加载"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(struct.calcsize(HEADER_FORMAT))
+        magic, version, n, dtype, frames_per_chunk, num_frames = struct.unpack(HEADER_FORMAT, header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是有效的轨迹文件: {path}")
+        self.num_particles = n
+        self.dtype = np.dtype(dtype.rstrip().decode())
+        self.frames_per_chunk = frames_per_chunk
+        # 写入中断时文件头可能落后，以文件中完整的块数为上限
+        _, _, self.chunk_bytes = _chunk_layout(n, self.dtype, frames_per_chunk)
+        num_chunks = (os.path.getsize(path) - HEADER_SIZE) // self.chunk_bytes
+        self.num_frames = min(num_frames, num_chunks * frames_per_chunk)
+        self._chunks = {}
+
+    def __len__(self):
+        return self.num_frames
+
+    def _chunk(self, chunk_index):
+        if chunk_index not in self._chunks:
+            offset = HEADER_SIZE + chunk_index * self.chunk_bytes
+            self._chunks[chunk_index] = _chunk_views(self.path, 'r', offset, self.num_particles,
+                                                     self.dtype, self.frames_per_chunk)
+        return self._chunks[chunk_index]
+
+    def frame(self, i):
+        """返回第 i 帧的 (步数, 位置, 速度)"""
+        if i < 0:
+            i += self.num_frames
+        if not 0 <= i < self.num_frames:
+            raise IndexError(f"帧序号超出范围: {i}")
+        chunk_index, slot = divmod(i, self.frames_per_chunk)
+        steps, positions, velocities = self._chunk(chunk_index)
+        return int(steps[slot]), positions[slot], velocities[slot]
+
+    def __getitem__(self, i):
+        return self.frame(i)
+
+    def __iter__(self):
+        for i in range(self.num_frames):
+            yield self.frame(i)
+
+    def steps(self):
+        """所有帧对应的模拟步数"""
+        num_chunks = -(-self.num_frames // self.frames_per_chunk)
+        steps = [np.asarray(self._chunk(c)[0]) for c in range(num_chunks)]
+        return np.concatenate(steps)[:self.num_frames] if steps else np.zeros(0, dtype=np.int64)
@@ -0,0 +1,241 @@
+# Copyright (c) [year] [your name]
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""各个游戏主循环的性能基准
+
+对每个阶段重复计时，输出中位数和 p95 (毫秒)，结果写成 JSON，
+可与保存的基准结果比较，找出变慢的阶段，例如：
+
+    python benchmark.py --out baseline.json
+    python benchmark.py --baseline baseline.json --tolerance 0.2
+
+蛋白质模拟的受力、能量和积分步使用无界面的 ProteinPhysics；
+绘制阶段以及开普勒、摆线两个游戏需要显示设备，没有时在结果中记为跳过。
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PROTEIN_DIR = os.path.join(ROOT, 'Physics_game5-拉格朗日方程之蛋白子模拟')
+KEPLER_DIR = os.path.join(ROOT, 'Physics_game4-开普勒第二定律')
+CYCLOID_DIR = os.path.join(ROOT, 'Physics_game3-摆线运动')
+
+PROTEIN_SIZES = [100, 1000, 10000, 100000]
+# 默认设置 (100 个粒子分布在边长 10 的立方体中) 的粒子数密度；
+# 立方体边长随粒子数放大，保持密度不变，否则 10^5 个粒子时几乎所有粒子对都在作用距离内
+PROTEIN_DENSITY = 100 / 10.0**3
+KEPLER_SIZES = [1, 10, 100]
+
+class Skipped(Exception):
+    """当前环境无法运行的阶段 (例如没有显示设备)"""
+
+def time_calls(func, repeat, warmup=1, setup=None):
+    """重复调用 func，返回每次耗时 (秒) 的列表；setup 在每次调用前执行，不计时"""
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+def summarize(samples):
+    samples = np.asarray(samples) * 1e3
+    return {
+        'median_ms': float(np.median(samples)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'repeat': len(samples),
+    }
+
+def import_from(directory, module):
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return __import__(module)
+
+def create_protein(n, seed):
+    np.random.seed(seed)
+    protein_physics = import_from(PROTEIN_DIR, 'protein_physics')
+    simulation = protein_physics.ProteinPhysics()
+    simulation.num_particles = n
+    simulation.box_size = (n / PROTEIN_DENSITY) ** (1 / 3)
+    simulation.reset_simulation()
+    return simulation
+
+def bench_protein_forces(n, repeat, seed):
+    simulation = create_protein(n, seed)
+    # evaluate 按位置缓存结果，每次计时前清除缓存，测量完整的受力计算
+    return time_calls(simulation.calculate_forces, repeat, setup=simulation.invalidate_cache)
+
+def bench_protein_energies(n, repeat, seed):
+    simulation = create_protein(n, seed)
+    return time_calls(simulation.calculate_energies, repeat, setup=simulation.invalidate_cache)
+
+def bench_protein_update(n, repeat, seed):
+    simulation = create_protein(n, seed)
+    return time_calls(simulation.update, repeat)
+
+_gl_window = None
+
+def open_gl_window():
+    """创建一个隐藏的 GLUT 窗口作为 OpenGL 上下文，整个进程只创建一次"""
+    global _gl_window
+    if _gl_window is not None:
+        return
+    try:
+        from OpenGL.GLUT import (glutInit, glutInitDisplayMode, glutInitWindowSize,
+                                 glutCreateWindow, glutHideWindow,
+                                 GLUT_DOUBLE, GLUT_RGB, GLUT_DEPTH)
+        glutInit(sys.argv[:1])
+        glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
+        glutInitWindowSize(800, 600)
+        _gl_window = glutCreateWindow(b"benchmark")
+        glutHideWindow()
+    except Exception as e:
+        raise Skipped(f"无法创建 OpenGL 上下文: {e}")
+
+def bench_protein_draw(n, repeat, seed):
+    open_gl_window()
+    try:
+        protein_simulation = import_from(PROTEIN_DIR, 'protein_simulation')
+    except Exception as e:
+        raise Skipped(f"无法导入绘制模块: {e}")
+    protein_simulation.init_gl(800, 600)
+    protein_simulation.ProteinSimulation.renderer = protein_simulation.create_renderer()
+    np.random.seed(seed)
+    simulation = protein_simulation.ProteinSimulation()
+    simulation.num_particles = n
+    simulation.box_size = (n / PROTEIN_DENSITY) ** (1 / 3)
+    simulation.reset_simulation()
+    return time_calls(simulation.draw, repeat)
+
+def create_tk_root():
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise Skipped(f"无法创建 Tk 窗口: {e}")
+    root.withdraw()
+    return root
+
+def bench_kepler_update(n, repeat, seed):
+    """开普勒模拟的 update (位置更新和画布绘制在同一个函数中)"""
+    np.random.seed(seed)
+    kepler = import_from(KEPLER_DIR, 'Keplers_Second_Law')
+    root = create_tk_root()
+    try:
+        app = kepler.KeplerSimulation(root)
+        while len(app.planets) < n:
+            app.add_planet()
+        # update 每次调用都会用 after 预约下一帧，不进入主循环时这些回调不会执行
+        return time_calls(app.update, repeat)
+    finally:
+        root.destroy()
+
+def bench_cycloid_update(n, repeat, seed):
+    """摆线模拟的 update_simulation，小球全部到达终点后重新开始 (不计时)"""
+    cycloid = import_from(CYCLOID_DIR, 'cycloid_simulation_2d')
+    root = create_tk_root()
+    try:
+        app = cycloid.CycloidSimulation(root)
+        def restart():
+            if not app.is_running:
+                app.start_simulation()
+        return time_calls(app.update_simulation, repeat, setup=restart)
+    finally:
+        root.destroy()
+
+# (游戏, 阶段, 计时函数, 默认规模)
+BENCHMARKS = [
+    ('protein', 'calculate_forces', bench_protein_forces, PROTEIN_SIZES),
+    ('protein', 'calculate_energies', bench_protein_energies, PROTEIN_SIZES),
+    ('protein', 'update', bench_protein_update, PROTEIN_SIZES),
+    ('protein', 'draw', bench_protein_draw, PROTEIN_SIZES),
+    ('kepler', 'update', bench_kepler_update, KEPLER_SIZES),
+    ('cycloid', 'update_simulation', bench_cycloid_update, [None]),
+]
+
+def benchmark_name(game, stage, n):
+    return f"{game}.{stage}" if n is None else f"{game}.{stage}[n={n}]"
+
+def run_benchmarks(games, sizes, repeat, seed):
+    results = {}
+    for game, stage, func, default_sizes in BENCHMARKS:
+        if game not in games:
+            continue
+        game_sizes = sizes if sizes and game == 'protein' else default_sizes
+        for n in game_sizes:
+            name = benchmark_name(game, stage, n)
+            try:
+                results[name] = summarize(func(n, repeat, seed))
+                print(f"{name}: 中位数 {results[name]['median_ms']:.3f} ms  "
+                      f"p95 {results[name]['p95_ms']:.3f} ms")
+            except Skipped as e:
+                results[name] = {'skipped': str(e)}
+                print(f"{name}: 跳过 ({e})")
+    return results
+
+def compare(results, baseline, tolerance):
+    """返回中位数比基准慢 tolerance 以上的阶段 [(名称, 基准, 当前)]"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference or 'median_ms' not in result or 'median_ms' not in reference:
+            continue
+        if result['median_ms'] > reference['median_ms'] * (1 + tolerance):
+            regressions.append((name, reference['median_ms'], result['median_ms']))
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="各游戏主循环的性能基准")
+    parser.add_argument('--games', nargs='+', default=['protein', 'kepler', 'cycloid'],
+                        choices=['protein', 'kepler', 'cycloid'], help="要测试的游戏")
+    parser.add_argument('--sizes', type=int, nargs='+', default=None,
+                        help="蛋白质模拟的粒子数，默认 100 1000 10000 100000")
+    parser.add_argument('--repeat', type=int, default=10, help="每个阶段计时的次数")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    parser.add_argument('--out', default=None, help="结果输出文件 (.json)")
+    parser.add_argument('--baseline', default=None, help="用于比较的基准结果文件 (.json)")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="中位数超过基准的比例上限，超过时视为性能退化")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_benchmarks(args.games, args.sizes, args.repeat, args.seed)
+
+    if args.out:
+        report = {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'results': results,
+        }
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"结果已保存到 {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for name, reference, current in regressions:
+            print(f"性能退化: {name} {reference:.3f} ms -> {current:.3f} ms "
+                  f"({current / reference - 1:+.1%})")
+        if regressions:
+            return 1
+        print("与基准相比没有性能退化")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())